@@ -0,0 +1,189 @@
+# Resident version of criterio_escolha.py: a small HTTP service that keeps the fire index, the
+# band 13 (cloud-top temperature) scene and the NDVI array in memory, refreshes them in the
+# background on their own cadence and answers the choice of each user from memory.
+#
+# GET /composition?lat=-10&lon=-50  ->  {"composition": "composição tempestade", "lat": -10.0, "lon": -50.0}
+# GET /status                       ->  time of the last refresh of each source
+
+# Required modules
+import asyncio                                        # Asynchronous I/O
+from datetime import datetime, timedelta, timezone    # Basic Dates and time types
+import json                                           # JSON encoder and decoder
+import os                                             # Miscellaneous operating system interfaces
+import time                                           # Time access and conversions
+from urllib.parse import urlparse, parse_qs           # Query string of the requests
+import numpy as np                                    # Scientific computing with Python
+import pandas as pd
+import requests
+import sys                                            # System-specific parameters
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from goes_fetch import download_CMI                   # Shared GOES-16 download layer
+from goes_projection import ndvi_projection           # lat / lon to indices of the CEPAGRI NDVI grid
+from scan_store import ingest_scan, prune_scans       # Decoded scans on the native grid
+from composition import choose_composition, is_storm, is_low_ndvi, FIRE_RADIUS # Choice of the composition
+from spatial_index import GridIndex                   # Spatial index for the fire foci
+from summary_tiles import EXTENT                      # Extent of Brazil
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Service
+HOST = os.environ.get('DECISION_HOST', '127.0.0.1')
+PORT = int(os.environ.get('DECISION_PORT', 8080))
+
+# Data
+input = "Samples"; os.makedirs(input, exist_ok=True)
+os.makedirs("Fire", exist_ok=True)
+ndvi_file = 'ndvi_20210102_br_max.npy' # NDVI provided by CEPAGRI
+
+# Refresh interval of each source (seconds): new band 13 scan every 10 min, fire foci file
+# updated during the day, NDVI composites are daily
+STORM_REFRESH = 10 * 60
+FIRE_REFRESH = 60 * 60
+NDVI_REFRESH = 24 * 3600
+
+#-----------------------------------------------------------------------------------------------------------
+
+class DecisionData:
+
+    # Latest data of each source. The refreshes build new objects and replace the old ones
+    # at once, so the queries never see a partial update
+
+    def __init__(self):
+        self.fire_index = None
+        self.storm = None        # (celsius array, fixed grid of the array)
+        self.ndvi = None
+        self.updated = {'fire': None, 'storm': None, 'ndvi': None}
+
+    def refresh_fire(self):
+        # Fire foci of the last 24 h (https://queimadas.dgi.inpe.br/queimadas/dados-abertos/)
+        data = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+        csv_url = 'https://queimadas.dgi.inpe.br/home/downloadfile?path=%2Fapp%2Fapi%2Fdata%2Fdados_abertos%2Ffocos%2FDiario%2Ffocos_abertos_24h_' + data + '.csv'
+        resposta = requests.get(csv_url, timeout=60)
+        if resposta.status_code == requests.codes.OK:
+            with open(f'Fire/dados_focos_{data}.csv', 'wb') as novo_arquivo:
+                novo_arquivo.write(resposta.content)
+        df = pd.read_csv(f'Fire/dados_focos_{data}.csv')
+        self.fire_index = GridIndex(df['lat'].to_numpy(), df['lon'].to_numpy())
+        self.updated['fire'] = time.time()
+
+    def refresh_storm(self):
+        # Latest band 13 scan (published a few minutes after its start), in celsius
+        date = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=10)
+        for _ in range(3):
+            yyyymmddhhmn = date.strftime('%Y%m%d%H') + f'{date.minute - date.minute % 10:02d}'
+            file_name = download_CMI(yyyymmddhhmn, 13, input)
+            if file_name != -1:
+                break
+            date = date - timedelta(minutes=10)
+        else:
+            return
+        # Without the quality flag, as the pixel is read by criterio_escolha.py (extract_native)
+        store = ingest_scan(f'{input}/{file_name}.nc', 'CMI', EXTENT, dqf_max=None)
+        self.storm = (store.read() - np.float32(273.15), store.projection)
+        self.updated['storm'] = time.time()
+        # Only the latest scan is kept in the store
+        prune_scans(store.scan_dir)
+
+    def refresh_ndvi(self):
+        self.ndvi = np.load(ndvi_file, allow_pickle=True)
+        self.updated['ndvi'] = time.time()
+
+    def fire_nearby(self, lat, lon):
+        return self.fire_index is not None and self.fire_index.any_within(lat, lon, FIRE_RADIUS)
+
+    def cloud_top(self, lat, lon):
+        if self.storm is None:
+            return np.nan
+        celsius, projection = self.storm
+        lin, col = projection.geo2grid(lat, lon)
+        if 0 <= lin < celsius.shape[0] and 0 <= col < celsius.shape[1]:
+            return float(celsius[lin, col])
+        return np.nan
+
+    def ndvi_value(self, lat, lon):
+        if self.ndvi is None:
+            return np.nan
+        lin, col = ndvi_projection.geo2grid(lat, lon)
+        if 0 <= lin < self.ndvi.shape[0] and 0 <= col < self.ndvi.shape[1]:
+            return float(self.ndvi[lin][col])
+        return np.nan
+
+state = DecisionData()
+
+def composition(lat, lon):
+    # Criterion of criterio_escolha.py (src/composition.py), answered from memory
+    return choose_composition(lambda: state.fire_nearby(lat, lon),
+                              lambda: is_storm(state.cloud_top(lat, lon)),
+                              lambda: is_low_ndvi(state.ndvi_value(lat, lon)))
+
+#-----------------------------------------------------------------------------------------------------------
+
+async def refresh_loop(name, refresh, interval):
+
+    # Refresh a source forever; the download and decoding run in a thread, so the queries
+    # are still answered meanwhile
+    while True:
+        try:
+            await asyncio.to_thread(refresh)
+            print(f'{name} refreshed')
+        except Exception as error:
+            # Keep serving the previous data
+            print(f'{name} refresh failed: {error}')
+        await asyncio.sleep(interval)
+
+def respond(writer, status, body, keep_alive):
+    data = json.dumps(body).encode()
+    writer.write(f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(data)}\r\n'
+                 f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + data)
+
+async def handle(reader, writer):
+
+    # Requests of one connection (HTTP/1.1 keep-alive)
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip().lower()
+            keep_alive = headers.get('connection') != 'close'
+
+            parts = request_line.decode('latin-1').split()
+            url = urlparse(parts[1] if len(parts) > 1 else '/')
+            query = parse_qs(url.query)
+            if url.path == '/composition':
+                try:
+                    lat, lon = float(query['lat'][0]), float(query['lon'][0])
+                except (KeyError, ValueError):
+                    respond(writer, '400 Bad Request', {'error': 'lat and lon are required'}, keep_alive)
+                else:
+                    respond(writer, '200 OK', {'composition': composition(lat, lon), 'lat': lat, 'lon': lon}, keep_alive)
+            elif url.path == '/status':
+                respond(writer, '200 OK', state.updated, keep_alive)
+            else:
+                respond(writer, '404 Not Found', {'error': 'not found'}, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def main():
+    server = await asyncio.start_server(handle, HOST, PORT)
+    refreshes = [asyncio.create_task(refresh_loop('fire', state.refresh_fire, FIRE_REFRESH)),
+                 asyncio.create_task(refresh_loop('storm', state.refresh_storm, STORM_REFRESH)),
+                 asyncio.create_task(refresh_loop('ndvi', state.refresh_ndvi, NDVI_REFRESH))]
+    print(f'Serving on http://{HOST}:{PORT}/composition?lat=..&lon=..')
+    async with server:
+        await server.serve_forever()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,6 +1,10 @@
 import pandas as pd
 import requests
 from datetime import datetime                   
+import os                                       # Miscellaneous operating system interfaces
+import sys                                      # System-specific parameters
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from spatial_index import GridIndex             # Spatial index for the fire foci
 
 lat = -10 
 lon = -50 
@@ -25,7 +29,9 @@ CSV_URL = 'https://queimadas.dgi.inpe.br/home/downloadfile?path=%2Fapp%2Fapi%2Fd
 baixar_arquivo_incendio(CSV_URL, f'Fire/dados_focos_{data}.csv')
 df = pd.read_csv(f'Fire/dados_focos_{data}.csv')
 
+# Index built once for the whole file
+index = GridIndex(df['lat'].to_numpy(), df['lon'].to_numpy())
+
 # Looking for a fire outbreak on the region of the user
-for i in range(len(df['lat'])):
-  if (df['lat'][i] <= (lat + 0.5) and df['lat'][i] >= (lat - 0.5)) and (df['lon'][i] <= (lon + 0.5) and df['lon'][i] >= (lon - 0.5)):
-    print("found fire")
\ No newline at end of file
+if index.any_within(lat, lon, 0.5):
+    print("found fire")
@@ -3,102 +3,11 @@ lon = -50 # lon
 
 import os                                # Miscellaneous operating system interfaces
 import numpy as np                       # Import the Numpy package
-import boto3                             # Amazon Web Services (AWS) SDK for Python
-from botocore import UNSIGNED            # boto3 config
-from botocore.config import Config       # boto3 config
-import math
 from datetime import datetime            # Basic Dates and time types
-
-
-def download_CMI(yyyymmddhhmn, band, path_dest):
-
-  os.makedirs(path_dest, exist_ok=True)
-
-  year = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%Y')
-  day_of_year = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%j')
-  hour = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%H')
-  min = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%M')
-
-  # AMAZON repository information 
-  bucket_name = 'noaa-goes16'
-  product_name = 'ABI-L2-CMIPF'
-
-  # Initializes the S3 client
-  s3_client = boto3.client('s3', config=Config(signature_version=UNSIGNED))
-  #-----------------------------------------------------------------------------------------------------------
-  # File structure
-  prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}-M6C{int(band):02.0f}_G16_s{year}{day_of_year}{hour}{min}'
-
-  # Seach for the file on the server
-  s3_result = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, Delimiter = "/")
-
-  #-----------------------------------------------------------------------------------------------------------
-  # Check if there are files available
-  if 'Contents' not in s3_result: 
-    # There are no files
-    print(f'No files found for the date: {yyyymmddhhmn}, Band-{band}')
-    return -1
-  else:
-    # There are files
-    for obj in s3_result['Contents']: 
-      key = obj['Key']
-      # Print the file name
-      file_name = key.split('/')[-1].split('.')[0]
-
-      # Download the file
-      if os.path.exists(f'{path_dest}/{file_name}.nc'):
-        print(f'File {path_dest}/{file_name}.nc exists')
-      else:
-        print(f'Downloading file {path_dest}/{file_name}.nc')
-        s3_client.download_file(bucket_name, key, f'{path_dest}/{file_name}.nc')
-  return f'{file_name}'
-
-def latlon2xy(lat, lon):
-    # goes_imagery_projection:semi_major_axis
-    req = 6378137 # meters
-    #  goes_imagery_projection:inverse_flattening
-    invf = 298.257222096
-    # goes_imagery_projection:semi_minor_axis
-    rpol = 6356752.31414 # meters
-    e = 0.0818191910435
-    # goes_imagery_projection:perspective_point_height + goes_imagery_projection:semi_major_axis
-    H = 42164160 # meters
-    # goes_imagery_projection: longitude_of_projection_origin
-    lambda0 = -1.308996939
-
-    # Convert to radians
-    latRad = lat * (math.pi/180)
-    lonRad = lon * (math.pi/180)
-
-    # (1) geocentric latitude
-    Phi_c = math.atan(((rpol * rpol)/(req * req)) * math.tan(latRad))
-    # (2) geocentric distance to the point on the ellipsoid
-    rc = rpol/(math.sqrt(1 - ((e * e) * (math.cos(Phi_c) * math.cos(Phi_c)))))
-    # (3) sx
-    sx = H - (rc * math.cos(Phi_c) * math.cos(lonRad - lambda0))
-    # (4) sy
-    sy = -rc * math.cos(Phi_c) * math.sin(lonRad - lambda0)
-    # (5)
-    sz = rc * math.sin(Phi_c)
-
-    # x,y
-    x = math.asin((-sy)/math.sqrt((sx*sx) + (sy*sy) + (sz*sz)))
-    y = math.atan(sz/sx)
-
-    return x, y
-
-# Functions to convert lat / lon extent to array indices 
-def geo2grid(lat, lon, nc):
-
-    # Apply scale and offset 
-    xscale, xoffset = nc.variables['x'].scale_factor, nc.variables['x'].add_offset
-    yscale, yoffset = nc.variables['y'].scale_factor, nc.variables['y'].add_offset
-    
-    x, y = latlon2xy(lat, lon)
-    col = (x - xoffset)/xscale
-    lin = (y - yoffset)/yscale
-    return int(lin), int(col)
-
+import sys                               # System-specific parameters
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from goes_fetch import download_CMI      # Shared GOES-16 download layer
+from goes_projection import GoesProjection  # lat / lon to fixed grid indices
 
 
 # Required modules
@@ -158,8 +67,9 @@ while (date_loop <= date_end):
     file = Dataset(f'{output}/{file_name_ch02}.nc')
                       
     # Convert lat/lon to grid-coordinates
-    lly, llx = geo2grid(extent[1], extent[0], file)
-    ury, urx = geo2grid(extent[3], extent[2], file)
+    projection = GoesProjection.from_netcdf(file)
+    lly, llx = projection.geo2grid(extent[1], extent[0])
+    ury, urx = projection.geo2grid(extent[3], extent[2])
 
     # Get the pixel values
     data_ch02 = file.variables['CMI'][ury:lly, llx:urx][::2 ,::2]   
@@ -170,8 +80,9 @@ while (date_loop <= date_end):
     file = Dataset(f'{output}/{file_name_ch03}.nc')
                       
     # Convert lat/lon to grid-coordinates
-    lly, llx = geo2grid(extent[1], extent[0], file)
-    ury, urx = geo2grid(extent[3], extent[2], file)
+    projection = GoesProjection.from_netcdf(file)
+    lly, llx = projection.geo2grid(extent[1], extent[0])
+    ury, urx = projection.geo2grid(extent[3], extent[2])
             
     # Get the pixel values
     data_ch03 = file.variables['CMI'][ury:lly, llx:urx]      
@@ -215,7 +126,7 @@ while (date_loop <= date_end):
       lon_point = lon1
       
       # Convert lat/lon to grid-coordinates
-      lat_ind, lon_ind = geo2grid(lat_point, lon_point, file)    
+      lat_ind, lon_ind = projection.geo2grid(lat_point, lon_point)    
       NDVI_point = (ndvi_max[lat_ind - ury, lon_ind - llx]).round(2)  
       ndvi_accumulative = ndvi_accumulative + NDVI_point
     #-----------------------------------------------------------------------------------------------------------
@@ -1,59 +1,13 @@
-import math
+import os                                # Miscellaneous operating system interfaces
 import numpy as np 
-
-# Functions to convert lat / lon extent to array indices 
-def geo2grid(lat, lon):
-
-    # Values scale and offset for NDVI 
-    xscale, xoffset = 1.4e-03, -0.151865
-    yscale, yoffset = -1.4e-03, 0.151865
-    
-    x, y = latlon2xy(lat, lon)
-    col = (x - xoffset)/xscale
-    lin = (y - yoffset)/yscale
-    return int(lin), int(col)
-
-def latlon2xy(lat, lon):
-    # goes_imagery_projection:semi_major_axis
-    req = 6378137 # meters
-    #  goes_imagery_projection:inverse_flattening
-    invf = 298.257222096
-    # goes_imagery_projection:semi_minor_axis
-    rpol = 6356752.31414 # meters
-    e = 0.0818191910435
-    # goes_imagery_projection:perspective_point_height + goes_imagery_projection:semi_major_axis
-    H = 42164160 # meters
-    # goes_imagery_projection: longitude_of_projection_origin
-    lambda0 = -1.308996939
-
-    # Convert to radians
-    latRad = lat * (math.pi/180)
-    lonRad = lon * (math.pi/180)
-
-    # (1) geocentric latitude
-    Phi_c = math.atan(((rpol * rpol)/(req * req)) * math.tan(latRad))
-    # (2) geocentric distance to the point on the ellipsoid
-    rc = rpol/(math.sqrt(1 - ((e * e) * (math.cos(Phi_c) * math.cos(Phi_c)))))
-    # (3) sx
-    sx = H - (rc * math.cos(Phi_c) * math.cos(lonRad - lambda0))
-    # (4) sy
-    sy = -rc * math.cos(Phi_c) * math.sin(lonRad - lambda0)
-    # (5)
-    sz = rc * math.sin(Phi_c)
-
-    # x,y
-    x = math.asin((-sy)/math.sqrt((sx*sx) + (sy*sy) + (sz*sz)))
-    y = math.atan(sz/sx)
-
-    return x, y
-
-
-
+import sys                               # System-specific parameters
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from goes_projection import ndvi_projection  # lat / lon to indices of the CEPAGRI NDVI grid
 
 lat = -10 # lat
 lon = -50 # lon
 
-x, y = geo2grid(lat, lon)
+x, y = ndvi_projection.geo2grid(lat, lon)
 
 # Open the file
 array = np.load('ndvi_20210102_br_max.npy', allow_pickle=True) # test file provided by CEPAGRI
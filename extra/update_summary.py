@@ -0,0 +1,90 @@
+# Tiling stage: aggregates the latest scan of every product on the summary tile grid over Brazil
+# (to be run after each new scan, e.g. every 10 minutes) and writes the lookup table used by
+# the location queries of the app (see criterio_escolha.py)
+
+# Required modules
+from netCDF4 import Dataset                           # Read / Write NetCDF4 files
+from datetime import datetime, timedelta, timezone    # Basic Dates and time types
+import os                                             # Miscellaneous operating system interfaces
+import numpy as np                                    # Scientific computing with Python
+import pandas as pd
+import requests
+import sys                                            # System-specific parameters
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from goes_fetch import download_PROD, download_CMI, download_GLM_range # Shared GOES-16 download layer
+from goes_projection import GoesProjection, ndvi_projection # GOES fixed grid geometry
+from scan_store import ingest_scan                    # Decoded scans on the native grid
+from summary_tiles import SummaryTiles, EXTENT, SUMMARY_FILE # Summary tile grid
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Directories
+input = "Samples"; os.makedirs(input, exist_ok=True)
+os.makedirs("Fire", exist_ok=True)
+
+# Desired data:
+bucket_name = 'noaa-goes16'
+ndvi_file = 'ndvi_20210102_br_max.npy' # NDVI provided by CEPAGRI
+glm_minutes = 10 # Lightning of the last minutes
+
+# Latest scan (the files are published a few minutes after the start of the scan)
+now = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=10)
+yyyymmddhhmn = now.strftime('%Y%m%d%H') + f'{now.minute - now.minute % 10:02d}'
+
+tiles = SummaryTiles()
+
+def add_scan(name, file_name, var, offset=0.0, dqf_max=1, pixels=False):
+
+    # Decoded window of the extent (native grid) and the lat / lon of its pixels. With pixels=True
+    # the range of the pixels of each tile is also kept, for the choice of the composition
+    if file_name == -1:
+        return
+    store = ingest_scan(f'{input}/{file_name}.nc', var, EXTENT, dqf_max=dqf_max)
+    lats, lons = store.projection.grid2latlon()
+    values = store.read() + np.float32(offset)
+    tiles.add_product(name, values, lats, lons)
+    if pixels:
+        tiles.add_pixels(name, values, store.projection)
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Rainfall rate (mm/h)
+add_scan('RRQPE', download_PROD(yyyymmddhhmn, 'ABI-L2-RRQPEF', input, bucket_name), 'RRQPE')
+
+# Cloud-top (band 13) brightness temperature (°C), without the quality flag, as the pixel is read
+# by the choice of the composition (criterio_escolha.py, extract_native)
+add_scan('CMI13', download_CMI(yyyymmddhhmn, 13, input, bucket_name), 'CMI', -273.15, dqf_max=None, pixels=True)
+
+# NDVI
+if os.path.exists(ndvi_file):
+    ndvi = np.load(ndvi_file, allow_pickle=True).astype(np.float32)
+    grid = GoesProjection(ndvi_projection.xscale, ndvi_projection.xoffset,
+                          ndvi_projection.yscale, ndvi_projection.yoffset, shape=ndvi.shape)
+    lats, lons = grid.grid2latlon()
+    tiles.add_product('NDVI', ndvi, lats, lons)
+    tiles.add_pixels('NDVI', ndvi, grid)
+
+# Fire foci of the last 24 h (https://queimadas.dgi.inpe.br/queimadas/dados-abertos/)
+data = (now - timedelta(days=1)).strftime('%Y%m%d')
+CSV_URL = 'https://queimadas.dgi.inpe.br/home/downloadfile?path=%2Fapp%2Fapi%2Fdata%2Fdados_abertos%2Ffocos%2FDiario%2Ffocos_abertos_24h_' + data + '.csv'
+resposta = requests.get(CSV_URL)
+if resposta.status_code == requests.codes.OK:
+    with open(f'Fire/dados_focos_{data}.csv', 'wb') as novo_arquivo:
+        novo_arquivo.write(resposta.content)
+if os.path.exists(f'Fire/dados_focos_{data}.csv'):
+    df = pd.read_csv(f'Fire/dados_focos_{data}.csv')
+    tiles.add_points('fire', df['lat'].to_numpy(), df['lon'].to_numpy(), radius=0.5)
+
+# Lightning flashes of the last minutes
+f_lats, f_lons = [], []
+for fileGLM in download_GLM_range(now - timedelta(minutes=glm_minutes), now, input, bucket_name):
+    glm = Dataset(f'{input}/{fileGLM}.nc')
+    f_lats.append(np.ma.filled(glm.variables['flash_lat'][:].astype(np.float64), np.nan))
+    f_lons.append(np.ma.filled(glm.variables['flash_lon'][:].astype(np.float64), np.nan))
+    glm.close()
+if f_lats:
+    tiles.add_points('lightning', np.concatenate(f_lats), np.concatenate(f_lons), radius=0.5)
+
+# Write the table (replaces the previous one at once)
+tiles.save(SUMMARY_FILE)
+print(f'{SUMMARY_FILE}: {len(tiles.fields)} fields, {tiles.nrow} x {tiles.ncol} tiles')
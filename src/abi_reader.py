@@ -0,0 +1,49 @@
+# Reading of ABI variables opened with GDAL (NETCDF:file.nc:var)
+#
+# Only the block of the full disk that covers the desired extent is read from the file,
+# so reading and reprojecting a scene of Brazil doesn't need the whole 5424 x 5424 array.
+# The packed values (int16 / uint16) and the DQF (uint8) are decoded into one float32 array,
+# without float64 temporaries.
+
+# Required modules
+import numpy as np                                    # Scientific computing with Python
+from goes_projection import GoesProjection            # GOES fixed grid geometry
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Extra lines and columns read around the extent (nearest neighbour needs at least one)
+WINDOW_MARGIN = 2
+
+def abi_window(img, extent, margin=WINDOW_MARGIN):
+
+    # Block (first line, last line + 1, first column, last column + 1) of the array that covers
+    # the extent and the fixed grid of that block, used to reproject it
+    projection = GoesProjection.from_gdal(img)
+    window = projection.window(extent, margin)
+    return window, projection.subset(*window)
+
+def read_window(img, window):
+
+    # Packed values of the block (same type as in the file)
+    lin0, lin1, col0, col1 = window
+    return img.ReadAsArray(col0, lin0, col1 - col0, lin1 - lin0)
+
+def decode_abi(packed, scale, offset, undef=None, dqf=None, dqf_max=1, out=None):
+
+    # Physical values (float32) of the packed array, with NaN's where the value is undef or the
+    # quality flag is greater than dqf_max. out may be a float32 array reused between scans
+    if out is None:
+        out = np.empty(packed.shape, dtype=np.float32)
+
+    # value = packed * scale + offset, computed in place
+    np.multiply(packed, scale, out=out, dtype=np.float32)
+    out += np.float32(offset)
+
+    # Remove undef
+    if undef is not None:
+        out[packed == undef] = np.nan
+
+    # Apply NaN's where the quality flag is greater than dqf_max
+    if dqf is not None:
+        out[dqf > dqf_max] = np.nan
+    return out
@@ -0,0 +1,66 @@
+# Running accumulation of many scans of the same grid (e.g. hourly and daily rainfall)
+#
+# The sum, the number of valid values, the maximum and the last valid value of every pixel are
+# updated in place when a scan is added, so the memory used doesn't grow with the number of scans.
+# NaN's (undef, bad quality, outside the disk) are ignored.
+
+# Required modules
+import numpy as np                                    # Scientific computing with Python
+
+#-----------------------------------------------------------------------------------------------------------
+
+class RasterAccumulator:
+
+    def __init__(self, shape=None, dtype=np.float32):
+        self.dtype = dtype
+        self.scans = 0
+        self.shape = None
+        if shape is not None:
+            self.allocate(shape)
+
+    def allocate(self, shape):
+        self.shape = tuple(shape)
+        self.sum = np.zeros(self.shape, dtype=self.dtype)
+        self.count = np.zeros(self.shape, dtype=np.uint16)
+        self.max = np.full(self.shape, np.nan, dtype=self.dtype)
+        self.last = np.full(self.shape, np.nan, dtype=self.dtype)
+        # Buffers reused by every scan
+        self.valid = np.empty(self.shape, dtype=bool)
+        self.weighted = np.empty(self.shape, dtype=self.dtype)
+
+    def reset(self):
+
+        # Start a new accumulation (e.g. a new hour) keeping the arrays
+        self.scans = 0
+        if self.shape is not None:
+            self.sum.fill(0)
+            self.count.fill(0)
+            self.max.fill(np.nan)
+            self.last.fill(np.nan)
+
+    def add(self, array, weight=1.0):
+
+        # Add a scan; weight multiplies the values added to the sum (e.g. the duration of the
+        # scan in hours, to turn a rate in mm/h into a total in mm)
+        if self.shape is None:
+            self.allocate(array.shape)
+        if array.shape != self.shape:
+            raise ValueError(f'Scan with shape {array.shape}, expected {self.shape}')
+
+        np.isfinite(array, out=self.valid)
+        np.multiply(array, weight, out=self.weighted, dtype=self.dtype)
+        np.add(self.sum, self.weighted, out=self.sum, where=self.valid)
+        np.add(self.count, 1, out=self.count, where=self.valid)
+        np.fmax(self.max, array, out=self.max)
+        np.copyto(self.last, array, where=self.valid)
+        self.scans += 1
+
+    @property
+    def total(self):
+        # Sum of the scans (0 where there was no valid value), without a copy
+        return self.sum
+
+    def mean(self):
+        # Mean of the (weighted) valid values (NaN where there was none)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, self.sum / self.count, np.nan).astype(self.dtype, copy=False)
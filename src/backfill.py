@@ -0,0 +1,142 @@
+# Backfill of hourly maps of ABI products for a range of dates
+#
+# The hours are downloaded by a pool of threads (I/O) and, as soon as an hour is on disk, its
+# scans are decoded, accumulated, reprojected and rendered by a pool of processes (CPU), so the
+# downloads of the next hours overlap with the processing of the previous ones.
+# Maps already on disk are skipped, so an interrupted backfill can simply be started again.
+
+# Required modules
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed # Parallel tasks
+from datetime import datetime, timedelta        # Basic Dates and time types
+import os                                       # Miscellaneous operating system interfaces
+import shutil                                   # High-level file operations
+import numpy as np                              # Scientific computing with Python
+from goes_fetch import download_range           # Shared GOES-16 download layer
+from reprojection import reproject              # Cached GOES -> lat/lon warp
+from scans import ScanAccumulator               # Accumulation of the scans of a period
+from rainfall import RainfallAccumulator        # Rainfall (mm) from the RRQPE scans
+from render import save_png                     # PNG images of the maps
+from derived_cache import get_derived_cache     # Cache of the reprojected maps
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Input and output directories
+input = "Samples"
+output = "Backfill"
+
+# Desired data:
+extent = [-75.0, -34, -34, 5.5] # Min lon, Min lat, Max lon, Max lat
+bucket_name = 'noaa-goes16'
+date_ini = datetime(2021, 12, 1) # First hour
+date_end = datetime(2022, 1, 1)  # Last hour (not included)
+colormap = 'binary'
+# Product: (variable, map of the hour: 'total', 'max', 'mean' or 'last')
+# RRQPE is a rate, its total is the rainfall (mm) of the hour
+products = {'ABI-L2-RRQPEF': ('RRQPE', 'total')}
+
+# Number of hours downloaded at once (each one with download_workers threads) and of processes
+hour_workers = 4
+download_workers = 4
+process_workers = os.cpu_count()
+
+#-----------------------------------------------------------------------------------------------------------
+
+def map_name(product_name, hour):
+    return f'{output}/{product_name}/{product_name}_{hour.strftime("%Y-%m-%d_%H")}.png'
+
+def download_hour(product_name, hour):
+    return download_range(product_name, hour, hour + timedelta(hours=1) - timedelta(seconds=1), input,
+                          bucket_name, download_workers)
+
+def hour_map(product_name, var, stat, file_names):
+
+    # Accumulate the scans of the hour on the native grid and reproject the map once
+    if var == 'RRQPE':
+        scans = RainfallAccumulator(extent, product_name, var)
+    else:
+        scans = ScanAccumulator(product_name, var, extent)
+    scans.add_files(file_names, input)
+    if scans.scans == 0:
+        return None
+
+    accumulator = scans.accumulator
+    if stat == 'total':
+        array = accumulator.total
+    elif stat == 'mean':
+        array = accumulator.mean()
+    else:
+        array = getattr(accumulator, stat)
+
+    data, geotransform = reproject(scans.projection, array, extent)
+    return {'data': data, 'geotransform': np.array(geotransform)}
+
+def render_hour(product_name, var, stat, hour, file_names):
+
+    # Map of the hour and its PNG image from the cache of derived products (each computed only the
+    # first time; the image is keyed by the map and the colormap)
+    if not file_names:
+        return None
+    cache = get_derived_cache()
+    key = cache.key(file_names, extent=extent, var=var, stat=stat, dqf_max=1)
+    hour_data = cache.arrays(key, lambda: hour_map(product_name, var, stat, file_names))
+    if hour_data is None:
+        return None
+
+    png_key = cache.key(key, cmap=colormap)
+    png = cache.file(png_key, '.png', lambda tmp_path: save_png(hour_data['data'], tmp_path, colormap))
+    file_name = map_name(product_name, hour)
+    shutil.copyfile(png, file_name)
+    return file_name
+
+#-----------------------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    # Hours still missing
+    tasks = []
+    hour = date_ini
+    while (hour < date_end):
+        for product_name in products:
+            if not os.path.exists(map_name(product_name, hour)):
+                tasks.append((product_name, hour))
+        hour = hour + timedelta(hours=1)
+    for product_name in products:
+        os.makedirs(f'{output}/{product_name}', exist_ok=True)
+    print(f'{len(tasks)} maps to produce')
+
+    with ThreadPoolExecutor(max_workers=hour_workers) as downloads, \
+         ProcessPoolExecutor(max_workers=process_workers) as processes:
+
+        # Download the hours; each hour is sent to the processes as soon as it is on disk.
+        # A failed hour (download or render) is reported and the others go on
+        downloading = {downloads.submit(download_hour, product_name, hour): (product_name, hour)
+                       for product_name, hour in tasks}
+        rendering = {}
+        failed = []
+        for future in as_completed(downloading):
+            product_name, hour = downloading[future]
+            var, stat = products[product_name]
+            try:
+                file_names = future.result()
+            except Exception as error:
+                print(f'{product_name} {hour}: download failed: {error}')
+                failed.append((product_name, hour))
+                continue
+            rendering[processes.submit(render_hour, product_name, var, stat, hour, file_names)] = (product_name, hour)
+
+        done = 0
+        for future in as_completed(rendering):
+            product_name, hour = rendering[future]
+            try:
+                if future.result() is not None:
+                    done += 1
+            except Exception as error:
+                print(f'{product_name} {hour}: map failed: {error}')
+                failed.append((product_name, hour))
+        print(f'{done} of {len(tasks)} maps produced')
+
+    # Hours to run again (the maps on disk are skipped)
+    if failed:
+        print(f'{len(failed)} hours failed:')
+        for product_name, hour in sorted(failed):
+            print(f'  {product_name} {hour.strftime("%Y-%m-%d %H:00")}')
@@ -0,0 +1,70 @@
+# Columnar (Parquet / Arrow IPC) storage for point data (GLM flashes, INPE fire foci)
+#
+# The tables are written as a dataset partitioned by day and hour (root/day=2021-12-16/hour=00/...),
+# with float32 lat/lon and a datetime64 time column, and read back memory-mapped.
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import time                                           # Time access and conversions
+import uuid                                           # Unique file names for each written chunk
+import numpy as np                                    # Scientific computing with Python
+import pandas as pd                                   # Data analysis and manipulation
+
+# Optional dependency, only needed for the columnar formats
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pds
+    import pyarrow.fs as pfs
+except ImportError:
+    pa = None
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Output formats accepted by the writers: 'parquet' and 'feather' (Arrow IPC)
+FORMATS = ('parquet', 'feather')
+
+def partitioning():
+    # Hive style directories: day=2021-12-16/hour=00
+    return pds.partitioning(pa.schema([('day', pa.string()), ('hour', pa.string())]), flavor='hive')
+
+def check_format(format):
+    if format not in FORMATS:
+        raise ValueError(f'Unknown columnar format: {format} (use one of {FORMATS})')
+    if pa is None:
+        raise ImportError(f'pyarrow is required to write or read {format} files (pip install pyarrow)')
+
+def typed_table(df, time_column='time'):
+
+    # lat / lon as float32 and the time as datetime64, plus the partition columns
+    df = df.copy()
+    for column in ('lat', 'lon'):
+        if column in df:
+            df[column] = df[column].astype(np.float32)
+    df[time_column] = pd.to_datetime(df[time_column]).astype('datetime64[s]')
+    df['day'] = df[time_column].dt.strftime('%Y-%m-%d')
+    df['hour'] = df[time_column].dt.strftime('%H')
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def write_partitioned(df, root, time_column='time', format='parquet'):
+
+    check_format(format)
+    os.makedirs(root, exist_ok=True)
+
+    # Each call adds new files to the partitions, so the writer can be called once per chunk
+    # (the names start with the write time, so the files are read back in the order they were written)
+    pds.write_dataset(typed_table(df, time_column), root, format=format, partitioning=partitioning(),
+                      basename_template=f'part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}-{{i}}.{format}',
+                      existing_data_behavior='overwrite_or_ignore')
+
+def time_filter(date_ini, date_end, time_column='time'):
+    # Rows with date_ini <= time <= date_end, for the filter of read_partitioned
+    return ((pds.field(time_column) >= pa.scalar(date_ini, pa.timestamp('s'))) &
+            (pds.field(time_column) <= pa.scalar(date_end, pa.timestamp('s'))))
+
+def read_partitioned(root, format='parquet', columns=None, filter=None):
+
+    check_format(format)
+
+    # Memory-mapped read of the whole dataset (or only some columns / partitions)
+    dataset = pds.dataset(root, format=format, partitioning=partitioning(), filesystem=pfs.LocalFileSystem(use_mmap=True))
+    return dataset.to_table(columns=columns, filter=filter).to_pandas()
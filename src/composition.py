@@ -0,0 +1,71 @@
+# Choice of the composition of a user position (see the diagram in the extra folder), shared by
+# extra/criterio_escolha.py and extra/decision_service.py
+#
+# Each test of the criterion is a function without arguments, called in the order of the diagram
+# and only when the previous ones didn't decide, so a source that isn't needed is never read.
+# The summary table (summary_tiles.py) answers a test only when it can't differ from reading the
+# pixel of the position; otherwise the summary_* functions return None and the pixel is read.
+
+# Required modules
+import random
+import numpy as np                                    # Scientific computing with Python
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Thresholds of the criterion
+FIRE_RADIUS = 0.5   # degrees (box around the position)
+STORM_CELSIUS = -50
+NDVI_MIN = 0.33
+PLEASANT = ["chuvas", "ventos", "ndvi"]
+
+def is_storm(celsius):
+    # Band 13 cloud-top temperature of a storm; NaN (no data) is never a storm
+    return bool(celsius <= STORM_CELSIUS)
+
+def is_low_ndvi(ndvi):
+    # NaN (no data) is never low
+    return bool(ndvi < NDVI_MIN)
+
+def choose_composition(fire_nearby, storm, low_ndvi):
+    if fire_nearby():
+        return "animação incendios"
+    if storm():
+        return "composição tempestade"
+    if low_ndvi():
+        return "composição ndvi"
+    return "composição " + random.choice(PLEASANT) + " agradavel"
+
+#-----------------------------------------------------------------------------------------------------------
+
+def summary_fire(tiles, lat, lon):
+
+    # Fire foci within FIRE_RADIUS from the tile counts: True / False, None if only some of the tiles
+    # that touch the box are inside it and have foci (or the table has no foci)
+    counts = tiles.count_within('fire', lat, lon, FIRE_RADIUS)
+    if counts is None:
+        return None
+    surely, maybe = counts
+    if surely > 0:
+        return True
+    if maybe == 0:
+        return False
+    return None
+
+def summary_test(tiles, name, lat, lon, test):
+
+    # test (is_storm, is_low_ndvi) of the pixel of the position from the range of the pixels of its
+    # tile: True if all of them pass, False if none does, None otherwise (or if the table doesn't
+    # have the product). A pixel without value doesn't pass, so it only matters for True
+    pixels = tiles.pixel_range(name, lat, lon)
+    if pixels is None:
+        return None
+    minimum, maximum, missing = pixels
+    if not missing and test(maximum) and test(minimum):
+        return True
+    if not test(minimum) and not test(maximum):
+        return False
+    return None
+
+def summary_or_pixel(answer, pixel):
+    # Answer of the table when it decided (True / False), the test of the pixel otherwise
+    return pixel() if answer is None else answer
@@ -0,0 +1,127 @@
+# Local cache of derived products (decoded arrays, reprojected grids, PNG images)
+#
+# Each entry is addressed by a hash of its source (object key or file names of the scans) and of
+# all the processing parameters (extent, variable, DQF threshold, colormap...), so the same
+# request is served from disk and a change of any parameter gives a new entry.
+# The least recently used entries are deleted when the cache grows beyond its disk budget.
+
+# Required modules
+import hashlib                                        # Cache keys
+import json                                           # JSON encoder and decoder
+import os                                             # Miscellaneous operating system interfaces
+import threading                                      # Thread-based parallelism
+import numpy as np                                    # Scientific computing with Python
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Where the derived products are kept and the disk budget (bytes)
+DERIVED_CACHE_DIR = os.environ.get('GOES_DERIVED_CACHE', '.derived_cache')
+DERIVED_CACHE_BYTES = int(os.environ.get('GOES_DERIVED_CACHE_BYTES', 5 * 1024 ** 3))
+
+class DerivedCache:
+
+    def __init__(self, root=DERIVED_CACHE_DIR, max_bytes=DERIVED_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Size of the cache on disk, computed on the first write
+        self.size = None
+
+    def key(self, source, **params):
+
+        # Hash of the source and of the parameters (in any order)
+        text = json.dumps({'source': source, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def path(self, key, suffix):
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def lookup(self, key, suffix):
+
+        # Path of the entry (marked as recently used), or None if it isn't in the cache
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store(self, key, suffix, write):
+
+        # Create the entry: write(tmp_path) writes the file, which is then moved into the cache
+        path = self.path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}'
+        write(tmp_path)
+        os.replace(tmp_path, path)
+        self.added(os.path.getsize(path))
+        return path
+
+    def file(self, key, suffix, write):
+        # Path of the entry, created with write(tmp_path) if it isn't in the cache
+        return self.lookup(key, suffix) or self.store(key, suffix, write)
+
+    def arrays(self, key, compute=None):
+
+        # Dictionary of arrays of the entry; if it isn't in the cache, compute() gives it
+        # (a None result, e.g. no valid scan, isn't stored)
+        path = self.lookup(key, '.npz')
+        if path is not None:
+            with np.load(path) as data:
+                return {name: data[name] for name in data.files}
+        if compute is None:
+            return None
+        arrays = compute()
+        if arrays is not None:
+            self.store(key, '.npz', lambda tmp_path: np.savez(tmp_path, **arrays))
+        return arrays
+
+    def entries(self):
+
+        # (last use, size, path) of all the files of the cache
+        entries = []
+        for dir_entry in os.scandir(self.root) if os.path.isdir(self.root) else []:
+            if dir_entry.is_dir():
+                for entry in os.scandir(dir_entry.path):
+                    # Files being written are left alone
+                    if entry.is_file() and '.tmp' not in entry.name:
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def added(self, nbytes):
+        with self.lock:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self.entries())
+            else:
+                self.size += nbytes
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+
+        # Delete the least recently used entries until the cache fits in the budget
+        entries = sorted(self.entries())
+        self.size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_derived_cache():
+
+    global _cache
+
+    # Shared cache of the process
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DerivedCache()
+    return _cache
@@ -2,13 +2,12 @@
 from netCDF4 import Dataset                           # Read / Write NetCDF4 files
 import matplotlib.pyplot as plt                       # Plotting library
 import os                                             # Miscellaneous operating system interfaces
+import warnings                                       # Warning control
 from osgeo import gdal                                # Python bindings for GDAL
 import numpy as np                                    # Scientific computing with Python
 from mpl_toolkits.basemap import Basemap              # Import the Basemap toolkit 
-import math                                           # Import the Math package
-import numpy as np
-os.environ['OPENCV_IO_ENABLE_OPENEXR'] = 'true'
-import cv2
+import dmw                                            # DMW vectors of a region
+from dmw import load_dmw, wind_components, polar_components, rasterize, WindGrid, TEXTURE_SHAPE
 gdal.PushErrorHandler('CPLQuietErrorHandler')         # Ignore GDAL warnings
 import imageio
 #-----------------------------------------------------------------------------------------------------------
@@ -19,123 +18,52 @@ output = "Output_DMW"; os.makedirs(output, exist_ok=True)
 # Desired data:
 extent = [-75.0, -34, -34, 5.5] # Min lon, Min lat, Max lon, Max lat
 title = "Derivated_Motion_Winds"
+# Texture: False gives the vectors on their own pixels (zero elsewhere); True a dense texture
+# interpolated from the nearest vectors of each pixel, which needs scipy
+gridded = False
 
 # Opening the NetCDF Derivated Motion Winds
 nc = Dataset('C:\\Gaia Senses\\python_goes\\Samples_DMW\\OR_ABI-L2-DMWF-M6C14_G16_s20212810600206_e20212810609514_c20212810623429.nc') 
 
-# Read the required variables: ================================================ 
-pressure = nc.variables['pressure'][:]
-temperature = nc.variables['temperature'][:]
-wind_direction = nc.variables['wind_direction'][:]
-wind_speed = nc.variables['wind_speed'][:]
-lats = nc.variables['lat'][:]
-lons = nc.variables['lon'][:]
-
-# Selecting data only from the region of interest: ============================
-# Detect Latitude lower and upper index, according to the selected extent: 
-latli = np.argmin( np.abs( lats - extent[1] ) ) # Lower index
-latui = np.argmin( np.abs( lats - extent[3] ) ) # Upper index
-
-# Detect the Longitude index:
-# Store the indexes where the lons are between the selected extent:
-lon_ind = np.where(( lons >= extent[0]) & (lons <= extent[2] ))[0]
-# Eliminate the lon indexes where we don't have the lat indexes:
-lon_ind = lon_ind[(lon_ind >= latui) & (lon_ind <= latli)]
-
-# Create the variables lists ==================================================
-pressure_a = []
-temperature_a = []
-wind_direction_a = []
-wind_speed_a = []
-lats_a = []
-lons_a = []
-
-# For each item, append the values to the respective variables ================
-for item in lon_ind:
-    lons_a.append(lons[item])
-    lats_a.append(lats[item])
-    pressure_a.append(pressure[item])
-    temperature_a.append(temperature[item])
-    wind_direction_a.append(wind_direction[item])
-    wind_speed_a.append(wind_speed[item])
-
-# Read the variables as numpy arrays
-temperature = np.asarray(temperature_a)
-wind_direction = np.asarray(wind_direction_a)
-wind_speed = np.asarray(wind_speed_a)
-lons = np.asarray(lons_a)
-lats = np.asarray(lats_a)
-  
-pressure = np.asarray(pressure_a)
-pressure_index = np.where(( pressure >= 100 ) & ( pressure <= 1000 ))[0]
+# Read only the wind vectors of the region of interest in the given pressure range (hPa)
+winds = load_dmw(nc, extent, pressure_range=(100, 1000))
+pressure = winds['pressure']
+temperature = winds['temperature']
+wind_direction = winds['wind_direction']
+wind_speed = winds['wind_speed']
+lons = winds['lon']
+lats = winds['lat']
 color = '#0000FF' # Blue 
     
-# Create the variables lists (considerign only the given pressure range)
-pressure_b = []
-temperature_b = []
-wind_direction_b = []
-wind_speed_b = []
-lats_b = []
-lons_b = []
-
-# For each item, append the values to the respective variables 
-for item in pressure_index:
-    lons_b.append(lons_a[item])
-    lats_b.append(lats_a[item])
-    pressure_b.append(pressure_a[item])
-    temperature_b.append(temperature_a[item])
-    wind_direction_b.append(wind_direction_a[item])
-    wind_speed_b.append(wind_speed_a[item])
-    
-# Final variables for the given pressure range
-# Read the variables as numpy arrays
-pressure = np.asarray(pressure_b)
-temperature = np.asarray(temperature_b)
-wind_direction = np.asarray(wind_direction_b)
-wind_speed = np.asarray(wind_speed_b)
-lons = np.asarray(lons_b)
-lats = np.asarray(lats_b)
-    
 # Calculating the u and v components using the wind_speed and wind direction
-u = []
-v = []
-
-componente_x_float = []
-componente_y_float = []
-for item in range(lons.shape[0]):
-    u.append(-(wind_speed[item]) * math.sin((math.pi / 180) * wind_direction[item])) 
-    v.append(-(wind_speed[item]) * math.cos((math.pi / 180) * wind_direction[item]))
-    if str(wind_speed[item]) != 'nan':
-        aux_x = wind_speed[item] * math.cos(wind_direction[item]) # Polar to rectangular coordinates
-        componente_x_float.append(aux_x)
-        aux_y = wind_speed[item] * math.sin(wind_direction[item]) # Polar to rectangular coordinates
-        componente_y_float.append(aux_y)
-    else:
-        componente_x_float.append(0)
-        componente_y_float.append(0)
-
-img = cv2.imread("FloatBase.exr") # Base with all positions zeroed
-img = img.astype(np.float32)
-for i in range(lons.size):
-    pixel_x = int(((lons[i] + 75) * 403)/41) # Pixel position that refers to a certain longitude (scale)
-    if 5.5 >= lats[i] >= -34: # If it is within the latitude range
-        pixel_y = 389 - int(((lats[i] + 34) * 389)/39.5) # Pixel position that refers to a certain latitude (scale)
-        if pixel_x < 403 and pixel_y < 389: # If it is within the dimension of the image
-            img[pixel_y, pixel_x] = [componente_x_float[i], componente_y_float[i], 0] # pixel_x e pixel_y are inverted, don't know why
+u_comp, v_comp = wind_components(wind_speed, wind_direction)
+
+# Polar to rectangular coordinates of the texture (0 where there is no wind speed)
+componente_x_float, componente_y_float = polar_components(wind_speed, wind_direction)
+
+if gridded and dmw.cKDTree is None:
+    warnings.warn('scipy is not installed, the texture is rasterized instead of gridded (pip install scipy)')
+    gridded = False
+if gridded:
+    # Texture with the inverse distance weighted components of the 8 nearest vectors of each pixel
+    textura_x, textura_y = WindGrid(lats, lons, TEXTURE_SHAPE, extent, k=8).interpolate([componente_x_float, componente_y_float])
+else:
+    # Texture with the mean components of the vectors of each pixel, zero elsewhere
+    (textura_x, textura_y), count = rasterize([componente_x_float, componente_y_float], lats, lons, TEXTURE_SHAPE, extent)
+img = np.zeros(TEXTURE_SHAPE + (3,), dtype=np.float32)
+img[:, :, 0] = textura_x
+img[:, :, 1] = textura_y
 
 imageio.imwrite("FloatImageDMW6.exr", img)
 
-# Read the u and v components as numpy arrays
-u_comp = np.asarray(u) 
-v_comp = np.asarray(v)
 bmap = Basemap(llcrnrlon=extent[0], llcrnrlat=extent[1], urcrnrlon=extent[2], urcrnrlat=extent[3], epsg=4326)
 x,y = bmap(lons, lats)
 bmap.barbs(x, y, u_comp, v_comp, length=2, pivot='middle', barbcolor=color) # Placing the barbs in the image to be plotted
 
 plt.axis('off')
 
-# Save the image
-plt.savefig(f'C:\\Gaia Senses\\python_goes\\{output}\\{title}{i}.png', transparent=True, bbox_inches='tight')
+# Save the image (one file, overwritten at each run; it used to end with the index of the last vector)
+plt.savefig(f'C:\\Gaia Senses\\python_goes\\{output}\\{title}.png', transparent=True, bbox_inches='tight')
 
 # Show the image
 plt.show()
\ No newline at end of file
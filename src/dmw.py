@@ -0,0 +1,161 @@
+# Derived Motion Winds (ABI-L2-DMWF): loading of the wind vectors of a region
+#
+# The extent and pressure range are applied as boolean masks on the whole variables, and only
+# the variables that are needed are read. The selected vectors are returned as a structured
+# array (one record per vector), e.g. winds['lat'], winds['wind_speed'].
+
+# Required modules
+from netCDF4 import Dataset                           # Read / Write NetCDF4 files
+import numpy as np                                    # Scientific computing with Python
+
+# Optional dependency, only needed for the gridding of the vectors (WindGrid)
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Variables of the DMW files read by default
+DMW_FIELDS = ('lat', 'lon', 'pressure', 'temperature', 'wind_direction', 'wind_speed')
+
+def read_variable(nc, name):
+    # Values of a variable as float32, with NaN's where they are masked (fill values)
+    return np.ma.filled(np.ma.asarray(nc.variables[name][:], dtype=np.float32), np.nan)
+
+def load_dmw(file, extent=None, pressure_range=(100, 1000), fields=DMW_FIELDS):
+
+    # Wind vectors within extent = [min lon, min lat, max lon, max lat] and with
+    # pressure_range[0] <= pressure (hPa) <= pressure_range[1]; file is a path or an open Dataset
+    nc = Dataset(file) if isinstance(file, str) else file
+
+    lats = read_variable(nc, 'lat')
+    lons = read_variable(nc, 'lon')
+    mask = np.isfinite(lats) & np.isfinite(lons)
+    if extent is not None:
+        mask &= (lons >= extent[0]) & (lons <= extent[2]) & (lats >= extent[1]) & (lats <= extent[3])
+
+    values = {'lat': lats, 'lon': lons}
+    if pressure_range is not None:
+        values['pressure'] = read_variable(nc, 'pressure')
+        mask &= (values['pressure'] >= pressure_range[0]) & (values['pressure'] <= pressure_range[1])
+
+    winds = np.empty(np.count_nonzero(mask), dtype=[(name, np.float32) for name in fields])
+    for name in fields:
+        winds[name] = (values[name] if name in values else read_variable(nc, name))[mask]
+
+    if isinstance(file, str):
+        nc.close()
+    return winds
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Wind textures used by the app: (lines, columns) and extent = [min lon, min lat, max lon, max lat]
+TEXTURE_SHAPE = (389, 403)
+TEXTURE_EXTENT = [-75.0, -34.0, -34.0, 5.5]
+
+def wind_components(wind_speed, wind_direction):
+    # u and v components (the direction is where the wind comes from, in degrees)
+    direction = np.deg2rad(wind_direction)
+    return -wind_speed * np.sin(direction), -wind_speed * np.cos(direction)
+
+def polar_components(wind_speed, wind_direction):
+    # Polar to rectangular coordinates of the textures (0 where there is no wind speed)
+    direction = np.deg2rad(wind_direction)
+    x = np.nan_to_num(wind_speed * np.cos(direction))
+    y = np.nan_to_num(wind_speed * np.sin(direction))
+    return x, y
+
+def texture_pixels(lats, lons, shape=TEXTURE_SHAPE, extent=TEXTURE_EXTENT):
+
+    # Line and column of each position in the texture, and which positions fall inside it.
+    # Positions on the last line (southern strip) and last column (max lon) of the extent are put
+    # on the edge pixels of the texture
+    nrow, ncol = shape
+    with np.errstate(invalid='ignore'):
+        inside = (lats >= extent[1]) & (lats <= extent[3]) & (lons >= extent[0]) & (lons <= extent[2])
+        cols = np.trunc((lons[inside] - extent[0]) * ncol / (extent[2] - extent[0]))
+        rows = nrow - np.trunc((lats[inside] - extent[1]) * nrow / (extent[3] - extent[1]))
+    rows = np.clip(rows, 0, nrow - 1).astype(np.int64)
+    cols = np.clip(cols, 0, ncol - 1).astype(np.int64)
+    return rows, cols, inside
+
+def rasterize(values, lats, lons, shape=TEXTURE_SHAPE, extent=TEXTURE_EXTENT, radius=0):
+
+    # Mean of each array of values over the vectors that fall in each pixel (0 where there is none),
+    # each vector covering the disk of the given radius (pixels) around its position. Vectors that
+    # share a pixel (or whose disks overlap) are averaged, not overwritten by the last one.
+    # Returns the rasterized arrays and the number of vectors of each pixel
+    nrow, ncol = shape
+    rows, cols, inside = texture_pixels(lats, lons, shape, extent)
+    values = [np.asarray(array, dtype=np.float64)[inside] for array in values]
+
+    sums = np.zeros((len(values), nrow * ncol))
+    count = np.zeros(nrow * ncol)
+    offsets = [(drow, dcol) for drow in range(-radius, radius + 1) for dcol in range(-radius, radius + 1)
+               if drow * drow + dcol * dcol <= radius * radius]
+    for drow, dcol in offsets:
+        r, c = rows + drow, cols + dcol
+        valid = (r >= 0) & (r < nrow) & (c >= 0) & (c < ncol)
+        pixels = r[valid] * ncol + c[valid]
+        count += np.bincount(pixels, minlength=nrow * ncol)
+        for k, array in enumerate(values):
+            sums[k] += np.bincount(pixels, weights=array[valid], minlength=nrow * ncol)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(count > 0, sums / count, 0).astype(np.float32)
+    return means.reshape((len(values),) + tuple(shape)), count.reshape(shape).astype(np.int64)
+
+def texture_latlon(shape=TEXTURE_SHAPE, extent=TEXTURE_EXTENT):
+
+    # lat / lon of the center of each pixel of the texture (same convention as texture_pixels)
+    nrow, ncol = shape
+    lons = extent[0] + (np.arange(ncol) + 0.5) * (extent[2] - extent[0]) / ncol
+    lats = extent[1] + (nrow - np.arange(nrow) + 0.5) * (extent[3] - extent[1]) / nrow
+    return np.meshgrid(lats, lons, indexing='ij')
+
+class WindGrid:
+
+    # Inverse distance weighted interpolation of the vectors of one DMW file on every pixel of the
+    # texture. The KD-tree of the vectors and the k nearest vectors of each pixel (with their weights)
+    # are computed once, so each field (u, v, speed, ...) is then just a weighted sum.
+    # Distances are in degrees, with the longitudes scaled by the cosine of the central latitude
+
+    def __init__(self, lats, lons, shape=TEXTURE_SHAPE, extent=TEXTURE_EXTENT, k=8, power=2, max_distance=None):
+        if cKDTree is None:
+            raise ImportError('scipy is required to grid the wind vectors (pip install scipy)')
+        self.shape = tuple(shape)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        self.valid = np.isfinite(lats) & np.isfinite(lons)
+        self.scale = np.cos(np.deg2rad((extent[1] + extent[3]) / 2))
+        points = np.column_stack([lons[self.valid] * self.scale, lats[self.valid]])
+
+        # k nearest vectors of each pixel (bounded by max_distance degrees), all cores
+        pixel_lats, pixel_lons = texture_latlon(self.shape, extent)
+        pixels = np.column_stack([pixel_lons.ravel() * self.scale, pixel_lats.ravel()])
+        k = max(1, min(k, len(points)))
+        tree = cKDTree(points.reshape(-1, 2))
+        distance, index = tree.query(pixels, k=k, workers=-1,
+                                     distance_upper_bound=np.inf if max_distance is None else max_distance)
+        distance, index = distance.reshape(len(pixels), k), index.reshape(len(pixels), k)
+
+        # Missing neighbours (beyond max_distance) come with index == number of vectors
+        found = index < len(points)
+        with np.errstate(divide='ignore'):
+            weights = np.where(found, 1.0 / np.maximum(distance, 1e-6) ** power, 0.0)
+        total = weights.sum(axis=1)
+        self.covered = (total > 0).reshape(self.shape)
+        self.weights = weights / np.where(total > 0, total, 1.0)[:, np.newaxis]
+        self.index = np.where(found, index, 0)
+
+    def interpolate(self, values):
+
+        # Interpolated arrays (k, nrow, ncol) of each array of values of the vectors (0 where no
+        # vector is within max_distance)
+        result = np.zeros((len(values),) + self.shape, dtype=np.float32)
+        for k, array in enumerate(values):
+            array = np.nan_to_num(np.asarray(array, dtype=np.float64)[self.valid])
+            if array.size:
+                result[k] = (array[self.index] * self.weights).sum(axis=1).reshape(self.shape)
+        return result
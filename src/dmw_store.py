@@ -0,0 +1,150 @@
+# Time-indexed store of the Derived Motion Winds of every channel (for the wind animations)
+#
+# The DMW files of all the channels of a time window are read once: the vectors of the region are
+# put on the 10-minute slot of their scan, the vectors seen by more than one channel at the same
+# place and level are kept only once, and the u / v components and the texture pixel of each vector
+# are computed on ingestion. Everything goes to one columnar dataset (see columnar.py) sorted by
+# time, so the frames of many hours are read back at once instead of reparsing the NetCDF files.
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import re                                             # Regular expressions
+import numpy as np                                    # Scientific computing with Python
+import pandas as pd                                   # Data analysis and manipulation
+from goes_fetch import download_range, file_start_time # Shared GOES-16 download layer
+from columnar import write_partitioned, read_partitioned, time_filter, check_format # Parquet / Arrow IPC
+from dmw import load_dmw, wind_components, texture_pixels, TEXTURE_SHAPE, TEXTURE_EXTENT # DMW vectors
+
+# Optional dependency, only needed for the deduplication of the vectors of different channels
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+#-----------------------------------------------------------------------------------------------------------
+
+DMW_PRODUCT = 'ABI-L2-DMWF'
+
+# Channels of the DMW product, in order of preference when the same vector comes from many of them
+# (02: visible, 0.5 km; 07: shortwave IR; 08-10: water vapour; 14: longwave IR)
+DMW_CHANNELS = (2, 7, 8, 9, 10, 14)
+
+# Where the store is kept (the vectors dataset and the list of the files already ingested)
+DMW_STORE_DIR = os.environ.get('GOES_DMW_STORE', 'Store_DMW')
+
+# Vectors of different channels in the same slot are the same vector when they are within this
+# distance (degrees, hPa), i.e. (distance / DEDUP_RES)^2 + (pressure difference / DEDUP_HPA)^2 <= 1
+DEDUP_RES = 0.05
+DEDUP_HPA = 25
+
+# Columns that identify a stored vector (a file ingested twice gives the same rows)
+KEY_COLUMNS = ['time', 'channel', 'lat', 'lon', 'pressure']
+
+# Time slot of the scans (minutes)
+SLOT_MINUTES = 10
+
+def dmw_channel(file_name):
+    # Channel of a DMW file name, e.g. OR_ABI-L2-DMWF-M6C14_G16_s2021281... -> 14
+    match = re.search(r'-M\dC(\d\d)_', file_name)
+    return int(match.group(1)) if match else None
+
+def download_dmw_range(date_ini, date_end, path_dest, bucket_name='noaa-goes16', channels=DMW_CHANNELS):
+    # Every DMW file of the channels between date_ini and date_end
+    return download_range(DMW_PRODUCT, date_ini, date_end, path_dest, bucket_name,
+                          key_filter=lambda key: dmw_channel(key.split('/')[-1]) in channels)
+
+def dmw_vectors(path, extent=TEXTURE_EXTENT, pressure_range=(100, 1000)):
+
+    # Vectors of one file as a DataFrame, with the slot, channel, u / v and texture pixel
+    file_name = os.path.splitext(os.path.basename(path))[0]
+    winds = load_dmw(path, extent, pressure_range)
+    winds = winds[np.isfinite(winds['wind_speed']) & np.isfinite(winds['wind_direction'])]
+    df = pd.DataFrame({name: winds[name] for name in winds.dtype.names})
+    df['u'], df['v'] = wind_components(winds['wind_speed'], winds['wind_direction'])
+    rows, cols, inside = texture_pixels(winds['lat'], winds['lon'], TEXTURE_SHAPE, TEXTURE_EXTENT)
+    df['row'] = np.full(len(df), -1, dtype=np.int16)
+    df['col'] = np.full(len(df), -1, dtype=np.int16)
+    df.loc[inside, 'row'] = rows.astype(np.int16)
+    df.loc[inside, 'col'] = cols.astype(np.int16)
+    df['channel'] = np.int8(dmw_channel(file_name))
+    df['time'] = pd.Timestamp(file_start_time(file_name)).floor(f'{SLOT_MINUTES}min')
+    return df
+
+def deduplicate(df, channels=DMW_CHANNELS):
+
+    # Vectors of different channels of the same slot within DEDUP_RES / DEDUP_HPA of each other are
+    # kept once: the vector of the preferred channel (the vectors are visited in order of preference
+    # and a vector is dropped when it is close to one already kept)
+    if cKDTree is None:
+        raise ImportError('scipy is required to deduplicate the wind vectors (pip install scipy)')
+    priority = df['channel'].map(pd.Series(range(len(channels)), index=channels)).fillna(len(channels))
+    df = df.assign(priority=priority.to_numpy()).sort_values(['time', 'priority'], kind='stable')
+
+    keep = np.ones(len(df), dtype=bool)
+    times = df['time'].to_numpy()
+    bounds = np.flatnonzero(np.r_[True, times[1:] != times[:-1], True])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        slot = df.iloc[start:end]
+        # Positions on the sphere (in degrees of arc, so the chord is the distance in degrees)
+        lats = np.deg2rad(slot['lat'].to_numpy(np.float64))
+        lons = np.deg2rad(slot['lon'].to_numpy(np.float64))
+        points = np.column_stack([np.rad2deg(np.cos(lats) * np.cos(lons)), np.rad2deg(np.cos(lats) * np.sin(lons)),
+                                  np.rad2deg(np.sin(lats)),
+                                  slot['pressure'].to_numpy(np.float64) * DEDUP_RES / DEDUP_HPA])
+        pairs = cKDTree(points).query_pairs(DEDUP_RES, output_type='ndarray')
+        channel = slot['channel'].to_numpy()
+        pairs = pairs[channel[pairs[:, 0]] != channel[pairs[:, 1]]]
+        # query_pairs gives i < j, i.e. i is preferred; visit the pairs in order of i
+        for i, j in pairs[np.argsort(pairs[:, 0], kind='stable')]:
+            if keep[start + i]:
+                keep[start + j] = False
+
+    return df[keep].drop(columns='priority').sort_values(['time', 'channel'], kind='stable')
+
+def ingest_dmw(file_names, path, root=DMW_STORE_DIR, extent=TEXTURE_EXTENT, pressure_range=(100, 1000), format='parquet'):
+
+    # Add the files (names without .nc, as returned by download_dmw_range) to the store. The files
+    # already ingested are skipped, and the files of each slot are written together, so the vectors
+    # of the different channels of a slot are deduplicated against each other
+    check_format(format)
+    os.makedirs(root, exist_ok=True)
+    done_file = os.path.join(root, 'ingested.txt')
+    done = set()
+    if os.path.exists(done_file):
+        with open(done_file) as f:
+            done = set(f.read().split())
+    pending = [name for name in file_names if name not in done]
+
+    slots = {}
+    for name in pending:
+        start = pd.Timestamp(file_start_time(name)).floor(f'{SLOT_MINUTES}min')
+        slots.setdefault(start, []).append(name)
+
+    for start in sorted(slots):
+        vectors = [dmw_vectors(f'{path}/{name}.nc', extent, pressure_range) for name in slots[start]]
+        df = deduplicate(pd.concat(vectors, ignore_index=True))
+        if len(df):
+            write_partitioned(df, os.path.join(root, 'vectors'), 'time', format)
+        # The list of ingested files is written after the vectors: a slot interrupted midway is
+        # ingested again (and may then be stored twice, read_dmw drops the repeated rows)
+        with open(done_file, 'a') as f:
+            f.write(''.join(f'{name}\n' for name in slots[start]))
+        print(f'{start}: {len(df)} vectors from {len(slots[start])} files')
+
+def read_dmw(date_ini=None, date_end=None, root=DMW_STORE_DIR, columns=None, format='parquet'):
+
+    # Vectors between date_ini and date_end (or all of them), sorted by time. The rows of a slot
+    # stored twice (interrupted ingestion) are dropped using the key columns, which are always read
+    filter = None if date_ini is None else time_filter(date_ini, date_end)
+    read_columns = None if columns is None else list(dict.fromkeys(KEY_COLUMNS + list(columns)))
+    df = read_partitioned(os.path.join(root, 'vectors'), format, read_columns, filter)
+    df = df.drop(columns=[name for name in ('day', 'hour') if name in df])
+    df = df.drop_duplicates(KEY_COLUMNS).sort_values('time', kind='stable').reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
+
+def frames(df):
+
+    # Time of each frame and the rows of the frame (start, end) in a DataFrame sorted by time
+    times, starts = np.unique(df['time'].to_numpy(), return_index=True)
+    ends = np.r_[starts[1:], len(df)]
+    return times, starts, ends
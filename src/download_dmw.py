@@ -1,44 +1,25 @@
-import boto3                                    # Amazon Web Services (AWS) SDK for Python
-from botocore import UNSIGNED                   # boto3 config
-from botocore.config import Config              # boto3 config
 import os
 from datetime import datetime                   # Basic Dates and time types
+from dmw_store import download_dmw_range, ingest_dmw, read_dmw, frames, DMW_CHANNELS, DMW_STORE_DIR # DMW store
 
 path_dest = 'Samples'
-yyyymmddhhmn = '202201021000'
 bucket_name = 'noaa-goes16'
-product_name = 'ABI-L2-DMWF'
 
-os.makedirs(path_dest, exist_ok=True)
-
-year = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%Y')
-day_of_year = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%j')
-hour = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%H')
-min = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%M')
+# Time window (every DMW file of the channels that starts between the two dates)
+date_ini = datetime(2022, 1, 2, 10, 0)
+date_end = datetime(2022, 1, 2, 16, 0)
+channels = DMW_CHANNELS # 02, 07, 08, 09, 10 and 14
 
-# Initializes the S3 client
-s3_client = boto3.client('s3', config=Config(signature_version=UNSIGNED))
-
-# File structure
-prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}-M6C02_G16_s{year}{day_of_year}{hour}{min}' 
+os.makedirs(path_dest, exist_ok=True)
 
-# Seach for the file on the server
-s3_result = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, Delimiter = "/")
+# List every hour once and download the files concurrently
+files_DMW = download_dmw_range(date_ini, date_end, path_dest, bucket_name, channels)
 
-# Check if there are files available
-if 'Contents' not in s3_result: 
-    # There are no files
-    print(f'No files found for the date: {yyyymmddhhmn}, Product-{product_name}')
-else:
-# There are files
-    for obj in s3_result['Contents']: 
-        key = obj['Key']
-        # Print the file name
-        file_name = key.split('/')[-1].split('.')[0]
+# Vectors of all the channels in one store (deduplicated, with u / v and the texture pixel)
+ingest_dmw(files_DMW, path_dest, DMW_STORE_DIR)
 
-    # Download the file
-        if os.path.exists(f'{path_dest}/{file_name}.nc'):
-            print(f'File {path_dest}/{file_name}.nc exists')
-        else:
-            print(f'Downloading file {path_dest}/{file_name}.nc')
-            s3_client.download_file(bucket_name, key, f'{path_dest}/{file_name}.nc')
\ No newline at end of file
+# Frames of the animation
+winds = read_dmw(date_ini, date_end, DMW_STORE_DIR, columns=['time', 'channel', 'u', 'v', 'row', 'col'])
+times, starts, ends = frames(winds)
+for time, start, end in zip(times, starts, ends):
+    print(f'{time}: {end - start} vectors')
@@ -1,146 +1,41 @@
 # Required modules
 from datetime import datetime                   # Basic Dates and time types
 import os                                       # Miscellaneous operating system interfaces
-from osgeo import osr                           # Python bindings for GDAL
-from osgeo import gdal                          # Python bindings for GDAL
 import numpy as np                              # Scientific computing with Python
-import boto3                                    # Amazon Web Services (AWS) SDK for Python
-from botocore import UNSIGNED                   # boto3 config
-from botocore.config import Config              # boto3 config
-gdal.PushErrorHandler('CPLQuietErrorHandler')   # Ignore GDAL warnings
+from goes_fetch import download_PROD            # Shared GOES-16 download layer
+from scan_store import ingest_scan              # Decoded scans on the native grid (memory-mapped)
 
 #-----------------------------------------------------------------------------------------------------------
 
-def reproject(file_name, ncfile, array, extent, undef):
-
-    # Read the original file projection and configure the output projection
-    source_prj = osr.SpatialReference()
-    source_prj.ImportFromProj4(ncfile.GetProjectionRef())
-    target_prj = osr.SpatialReference()
-    target_prj.ImportFromProj4("+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs")
-   
-    # Reproject the data
-    GeoT = ncfile.GetGeoTransform()
-    driver = gdal.GetDriverByName('MEM')
-    raw = driver.Create('raw', array.shape[0], array.shape[1], 1, gdal.GDT_Float32)
-    raw.SetGeoTransform(GeoT)
-    raw.GetRasterBand(1).WriteArray(array)
-
-    # Define the parameters of the output file  
-    kwargs = {'format': 'netCDF', \
-            'srcSRS': source_prj, \
-            'dstSRS': target_prj, \
-            'outputBounds': (extent[0], extent[3], extent[2], extent[1]), \
-            'outputBoundsSRS': target_prj, \
-            'outputType': gdal.GDT_Float32, \
-            'srcNodata': undef, \
-            'dstNodata': 'nan', \
-            'resampleAlg': gdal.GRA_NearestNeighbour}
-
-    # Write the reprojected file on disk
-    gdal.Warp(file_name, raw, **kwargs)
-
-#-----------------------------------------------------------------------------------------------------------
-
-def download_PROD(yyyymmddhhmn, product_name, path_dest, bucket_name):
-
-  os.makedirs(path_dest, exist_ok=True)
-
-  year = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%Y')
-  day_of_year = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%j')
-  hour = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%H')
-  min = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%M')
-
-  # Initializes the S3 client
-  s3_client = boto3.client('s3', config=Config(signature_version=UNSIGNED))
-
-  # File structure
-  prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}-M6_G16_s{year}{day_of_year}{hour}{min}'
-
-  # Seach for the file on the server
-  s3_result = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, Delimiter = "/")
-
-  # Check if there are files available
-  if 'Contents' not in s3_result: 
-    # There are no files
-    print(f'No files found for the date: {yyyymmddhhmn}, Product-{product_name}')
-    return -1
-  else:
-    # There are files
-    for obj in s3_result['Contents']: 
-      key = obj['Key']
-      # Print the file name
-      file_name = key.split('/')[-1].split('.')[0]
-
-      # Download the file
-      if os.path.exists(f'{path_dest}/{file_name}.nc'):
-        print(f'File {path_dest}/{file_name}.nc exists')
-      else:
-        print(f'Downloading file {path_dest}/{file_name}.nc')
-        s3_client.download_file(bucket_name, key, f'{path_dest}/{file_name}.nc')
-  return f'{file_name}'
-
-#-----------------------------------------------------------------------------------------------------------
-
-# Input and output directories
+# Input directory
 input = "Samples"; os.makedirs(input, exist_ok=True)
-output = "Output"; os.makedirs(output, exist_ok=True)
 
 # Desired data:
-extent = [-75.0, -34, -34, 5.5] # Min lon, Min lat, Max lon, Max lat (values for Brazil)
+extent = [-75.0, -34, -34, 5.5] # Min lon, Min lat, Max lon, Max lat
 bucket_name = 'noaa-goes16'
 product_name = 'ABI-L2-RRQPEF'
 var = 'RRQPE'
-lon = -63.15
-lat = -7.603
+# Users' positions (all of them are extracted from the same scene in one pass)
+lats = np.array([-7.603]) # Exemple
+lons = np.array([-63.15])
+radius = 0 # Neighbourhood (in pixels) around each position, e.g. 2 for the max within 2 pixels
 
-array = np.zeros((5424,5424))
 minute = int(datetime.now().strftime('%M'))
-yyyymmddhhmn = datetime.now().strftime('%Y%m%d%H' + str(minute - (minute % 10))) 
+yyyymmddhhmn = datetime.now().strftime('%Y%m%d%H' + str(minute - (minute % 10)))
 
-# Download and open the file
+# Download the file
 file_name = download_PROD(yyyymmddhhmn, product_name, input, bucket_name)
-img = gdal.Open(f'NETCDF:{input}/{file_name}.nc:' + var)
-dqf = gdal.Open(f'NETCDF:{input}/{file_name}.nc:DQF')
-
-# Read the header metadata
-metadata = img.GetMetadata()
-scale = float(metadata.get(var + '#scale_factor'))
-offset = float(metadata.get(var + '#add_offset'))
-undef = float(metadata.get(var + '#_FillValue'))
-dtime = metadata.get('NC_GLOBAL#time_coverage_start')
-unit = metadata.get(var + '#units')
 
-# Load the data
-ds = img.ReadAsArray(0, 0, img.RasterXSize, img.RasterYSize).astype(float)
-ds_dqf = dqf.ReadAsArray(0, 0, dqf.RasterXSize, dqf.RasterYSize).astype(float)
+# Ingest the scan in the store once (native grid of the extent, NaN's where the quality flag is
+# greater than 1); the next lookups of the same scan only read the tiles around the positions
+store = ingest_scan(f'{input}/{file_name}.nc', var, extent, dqf_max=1)
 
-# Remove undef
-ds[ds == undef] = np.nan
-
-# Apply the scale and offset 
-ds = (ds * scale + offset)
-
-# Apply NaN's where the quality flag is greater than 1
-ds[ds_dqf > 1] = np.nan
-
-# Reproject the file
-array = np.nansum(np.dstack((array, ds)),2)
-filename = f'{output}/reproject_{yyyymmddhhmn}.nc'
-reproject(filename, img, array, extent, undef)
-
-# Read number of cols and rows
-sat_data = gdal.Open(filename)
-ncol = sat_data.RasterXSize
-nrow = sat_data.RasterYSize
-
-# Load the data
-sat_array = sat_data.ReadAsArray(0, 0, ncol, nrow).astype(float)
+# Read the header metadata
+dtime = store.header['time']
+unit = store.header['units']
 
-# Get geotransform
-transform = sat_data.GetGeoTransform()
-x = int((lon - transform[0]) / transform[1])
-y = int((transform[3] - lat) / -transform[5]) 
-sat = sat_array[y,x]
+# Read the values straight from the GOES fixed grid
+values = store.values(lats, lons, radius, 'max')
 
-print("value: ", sat, unit)
\ No newline at end of file
+for lat, lon, sat in zip(lats, lons, values):
+    print(f"({lat}, {lon}) value: ", sat, unit)
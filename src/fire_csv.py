@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt                       # Plotting library
 import cartopy, cartopy.crs as ccrs                   # Plot maps
 import cartopy.io.shapereader as shpreader            # Import shapefiles
 import requests
+from columnar import write_partitioned                 # Parquet / Arrow IPC output
 
 # https://queimadas.dgi.inpe.br/queimadas/dados-abertos/
 
@@ -14,6 +15,7 @@ def baixar_arquivo(url, endereco):
 
 # Especificar o dia que você quer os focos de incêndio (tem do dia anterior ao atual até um mês atras mais ou menos)
 data = '20220415' #formato AnoMesDia
+formato_saida = 'csv' # 'csv', ou 'parquet' / 'feather' para um dataset particionado por dia e hora
 
 #Define URL dos dados a serem baixados:
 CSV_URL = 'https://queimadas.dgi.inpe.br/home/downloadfile?path=%2Fapp%2Fapi%2Fdata%2Fdados_abertos%2Ffocos%2FDiario%2Ffocos_abertos_24h_' + data + '.csv'
@@ -32,7 +34,12 @@ df = pd.read_csv(f'Fire/dados_focos_{data}.csv')
 df.query(f'{latN} >= lat >= {latS} \
             and {lonE} >= lon >= {lonW} ', inplace = True)
 
-df.to_csv(f'Fire/dados_filtrados_{data}.csv', index=False) #salva os dados filtrados em um novo csv
+if formato_saida == 'csv':
+    df.to_csv(f'Fire/dados_filtrados_{data}.csv', index=False) #salva os dados filtrados em um novo csv
+else:
+    # Coluna com a data e hora do foco (o nome muda entre as versões do arquivo do INPE)
+    coluna_tempo = 'data' if 'data' in df else 'data_hora_gmt'
+    write_partitioned(df, f'Fire/dados_filtrados_{data}', coluna_tempo, formato_saida)
 
 # Choose the plot size (width x height, in inches)
 dpi = 125
@@ -0,0 +1,93 @@
+# Streaming accumulation of GLM flashes
+#
+# The flashes of each 20-second file are appended to fixed-size columnar buffers (lat, lon, time)
+# that are written to disk every time they fill up, so exporting several days of flashes takes
+# linear time and bounded memory instead of copying a growing DataFrame for every file.
+# The output is a csv file or, with format='parquet' / 'feather', a dataset partitioned by day and hour.
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import shutil                                         # High-level file operations
+import numpy as np                                    # Scientific computing with Python
+import pandas as pd                                   # Data analysis and manipulation
+from columnar import check_format, write_partitioned  # Parquet / Arrow IPC output
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Number of flashes kept in memory before a flush
+CHUNK_SIZE = 1_000_000
+
+# Marker of the datasets written by a FlashAccumulator (hidden files are skipped by the readers)
+MARKER = '.glm_flashes'
+
+class FlashAccumulator:
+
+    def __init__(self, file_name, chunk_size=CHUNK_SIZE, format='csv', overwrite=False):
+        if format != 'csv':
+            check_format(format)
+        self.file_name = file_name
+        self.format = format
+        self.chunk_size = chunk_size
+        self.lat = np.empty(chunk_size, dtype=np.float32)
+        self.lon = np.empty(chunk_size, dtype=np.float32)
+        self.time = np.empty(chunk_size, dtype='datetime64[s]')
+        self.size = 0
+        self.written = 0
+
+        # Start a new output file. A directory is only removed if it is a dataset written here before
+        # (or empty), any other directory only with overwrite=True
+        os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+        if os.path.isdir(file_name):
+            if not (overwrite or os.path.exists(os.path.join(file_name, MARKER)) or not os.listdir(file_name)):
+                raise FileExistsError(f'{file_name} is a directory not written by FlashAccumulator (use overwrite=True to replace it)')
+            shutil.rmtree(file_name)
+        elif os.path.exists(file_name):
+            os.remove(file_name)
+        if format != 'csv':
+            os.makedirs(file_name)
+            open(os.path.join(file_name, MARKER), 'w').close()
+
+    def append(self, f_lats, f_lons, time):
+
+        # Flashes of one GLM file, all with the same time
+        f_lats = np.ma.filled(np.ma.asarray(f_lats, dtype=np.float32), np.nan)
+        f_lons = np.ma.filled(np.ma.asarray(f_lons, dtype=np.float32), np.nan)
+        time = np.datetime64(time, 's')
+
+        start = 0
+        while start < f_lats.size:
+            # Copy as much as fits in the current buffers
+            count = min(f_lats.size - start, self.chunk_size - self.size)
+            self.lat[self.size:self.size + count] = f_lats[start:start + count]
+            self.lon[self.size:self.size + count] = f_lons[start:start + count]
+            self.time[self.size:self.size + count] = time
+            self.size += count
+            start += count
+
+            if self.size == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+
+        if self.size == 0:
+            return
+
+        df = pd.DataFrame({"lat": self.lat[:self.size], "lon": self.lon[:self.size], "time": self.time[:self.size]},
+                          index=pd.RangeIndex(self.written, self.written + self.size))
+
+        if self.format == 'csv':
+            # The header is written only with the first chunk
+            df.to_csv(self.file_name, mode='a', header=(self.written == 0), date_format='%Y-%m-%d %H:%M:%S')
+        else:
+            write_partitioned(df, self.file_name, 'time', self.format)
+
+        self.written += self.size
+        self.size = 0
+
+    def close(self):
+        self.flush()
+
+        # No flashes at all: still write the csv header
+        if self.written == 0 and self.format == 'csv':
+            pd.DataFrame(columns=["lat", "lon", "time"]).to_csv(self.file_name)
+        return self.written
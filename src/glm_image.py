@@ -6,50 +6,11 @@ from datetime import datetime                         # Basic Dates and time typ
 import os                                             # Miscellaneous operating system interfaces
 from osgeo import gdal                                # Python bindings for GDAL
 import cartopy.io.shapereader as shpreader            # Import shapefiles
-import boto3                                          # Amazon Web Services (AWS) SDK for Python
-from botocore import UNSIGNED                         # boto3 config
-from botocore.config import Config                    # boto3 config
+from goes_fetch import download_GLM                   # Shared GOES-16 download layer
 gdal.PushErrorHandler('CPLQuietErrorHandler')         # Ignore GDAL warnings
 
 #-----------------------------------------------------------------------------------------------------------
 
-def download_GLM(yyyymmddhhmnss, path_dest, bucket_name):
-
-  os.makedirs(path_dest, exist_ok=True)
-
-  year = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%Y')
-  day_of_year = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%j')
-  hour = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%H')
-  min = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%M')
-  seg = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%S')
-
-  # Initializes the S3 client
-  s3_client = boto3.client('s3', config=Config(signature_version=UNSIGNED))
-
-  # File structure
-  product_name = "GLM-L2-LCFA"
-  prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}_G16_s{year}{day_of_year}{hour}{min}{seg}'
-
-  # Seach for the file on the server
-  s3_result = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, Delimiter = "/")
-
-  # Check if there are files available
-  if 'Contents' not in s3_result: 
-    print(f'No files found for the date: {yyyymmddhhmnss}, Product-{product_name}')
-    return -1
-  else:
-    for obj in s3_result['Contents']: 
-      key = obj['Key']
-      file_name = key.split('/')[-1].split('.')[0]
-      if os.path.exists(f'{path_dest}/{file_name}.nc'):
-        print(f'File {path_dest}/{file_name}.nc exists')
-      else:
-        print(f'Downloading file {path_dest}/{file_name}.nc')
-        s3_client.download_file(bucket_name, key, f'{path_dest}/{file_name}.nc')
-  return f'{file_name}'
-
-#-----------------------------------------------------------------------------------------------------------
-
 # Input and output directories
 input = "Samples"; os.makedirs(input, exist_ok=True)
 output = "Output"; os.makedirs(output, exist_ok=True)
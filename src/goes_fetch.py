@@ -0,0 +1,297 @@
+# Shared download layer for the GOES-16 bucket on AWS
+# https://noaa-goes16.s3.amazonaws.com/index.html
+#
+# All the scripts use the same long-lived S3 client, so the client construction and the
+# TLS handshakes are paid once per process instead of once per downloaded file.
+
+# Required modules
+from datetime import timedelta, datetime, timezone  # Basic Dates and time types
+from concurrent.futures import ThreadPoolExecutor, as_completed  # Thread pool for bulk downloads
+import json                                     # JSON encoder and decoder
+import os                                       # Miscellaneous operating system interfaces
+import re                                       # Regular expressions
+import shutil                                   # High-level file operations
+import threading                                # Thread-based parallelism
+import time                                     # Time access and conversions
+import boto3                                    # Amazon Web Services (AWS) SDK for Python
+from botocore import UNSIGNED                   # boto3 config
+from botocore.config import Config              # boto3 config
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Size of the HTTP connection pool kept by the shared client
+MAX_POOL_CONNECTIONS = 32
+
+# Number of simultaneous downloads in the bulk mode
+MAX_WORKERS = 16
+
+# Point the client to another S3 endpoint (moto server, MinIO...) instead of AWS
+ENDPOINT_URL = os.environ.get('GOES_S3_ENDPOINT_URL')
+
+# Listing cache: where it is kept and for how long (in seconds) a listing is valid
+LISTING_CACHE_DIR = os.environ.get('GOES_LISTING_CACHE', '.listing_cache')
+PAST_HOUR_TTL = 7 * 24 * 3600
+CURRENT_HOUR_TTL = 60
+
+# An hour is considered complete this long after its end (late files are still published)
+HOUR_GRACE = timedelta(minutes=30)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_s3_client():
+
+    global _client
+
+    # Initializes the S3 client only once (boto3 clients are thread safe)
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                config = Config(signature_version=UNSIGNED,
+                                max_pool_connections=MAX_POOL_CONNECTIONS,
+                                tcp_keepalive=True,
+                                retries={'max_attempts': 5, 'mode': 'standard'})
+                _client = boto3.client('s3', config=config, endpoint_url=ENDPOINT_URL)
+    return _client
+
+def set_s3_client(client):
+
+    # Replace the shared client (e.g. by a moto client or a LocalBucketClient in tests)
+    global _client
+    with _client_lock:
+        _client = client
+
+#-----------------------------------------------------------------------------------------------------------
+
+class LocalBucketClient:
+
+    # Local stand-in for the S3 client: each bucket is a directory inside root and each key is
+    # a file path relative to it. Only the calls used by this module are implemented.
+
+    def __init__(self, root):
+        self.root = root
+
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, **kwargs):
+        bucket_dir = os.path.join(self.root, Bucket)
+        contents = []
+        for dirpath, dirnames, filenames in os.walk(bucket_dir):
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), bucket_dir).replace(os.sep, '/')
+                if not key.startswith(Prefix):
+                    continue
+                # With a delimiter, keys below another "folder" are not listed
+                if Delimiter and Delimiter in key[len(Prefix):]:
+                    continue
+                contents.append({'Key': key, 'Size': os.path.getsize(os.path.join(dirpath, name))})
+        contents.sort(key=lambda obj: obj['Key'])
+        result = {'KeyCount': len(contents), 'IsTruncated': False}
+        if contents:
+            result['Contents'] = contents
+        return result
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        shutil.copyfile(os.path.join(self.root, Bucket, *Key.split('/')), Filename)
+
+#-----------------------------------------------------------------------------------------------------------
+
+def file_start_time(file_name):
+
+    # Scan start time of a GOES-R file name, e.g. OR_GLM-L2-LCFA_G16_s20220631456200_... -> 2022-03-04 14:56:20
+    start = re.search(r'_s(\d{13})', file_name).group(1)
+    return datetime.strptime(start, '%Y%j%H%M%S')
+
+class ListingIndex:
+
+    # Index of the bucket listings, one entry per hour "folder" ({product}/{year}/{doy}/{hour}/).
+    # Each folder is listed once, kept in memory and on disk, and timestamps are resolved to keys
+    # locally. Listings fetched after the hour was complete don't change anymore and are kept for
+    # PAST_HOUR_TTL, the ones fetched earlier are listed again after CURRENT_HOUR_TTL.
+
+    def __init__(self, cache_dir=LISTING_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.listings = {}
+        self.lock = threading.Lock()
+
+    def ttl(self, hour_prefix, fetched):
+
+        # A listing is kept for PAST_HOUR_TTL only if it was fetched after the hour was complete;
+        # fetched while the hour was still being published, it is listed again after CURRENT_HOUR_TTL
+        product_name, year, day_of_year, hour = hour_prefix.strip('/').split('/')[-4:]
+        hour_end = datetime.strptime(f'{year}{day_of_year}{hour}', '%Y%j%H') + timedelta(hours=1)
+        complete = (hour_end + HOUR_GRACE).replace(tzinfo=timezone.utc).timestamp()
+        return PAST_HOUR_TTL if fetched > complete else CURRENT_HOUR_TTL
+
+    def valid(self, hour_prefix, fetched, now):
+        return now - fetched < self.ttl(hour_prefix, fetched)
+
+    def read_cache(self, cache_file):
+        # (fetch time, keys) of a listing on disk, None if there is none (or it is unreadable)
+        try:
+            with open(cache_file) as f:
+                entry = json.load(f)
+            return entry['fetched'], entry['keys']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def cache_file(self, bucket_name, hour_prefix):
+        return os.path.join(self.cache_dir, bucket_name, hour_prefix.strip('/').replace('/', '_') + '.json')
+
+    def list_remote(self, bucket_name, hour_prefix):
+        # All the keys of the folder, following the pagination
+        keys = []
+        kwargs = {'Bucket': bucket_name, 'Prefix': hour_prefix, 'Delimiter': "/"}
+        while True:
+            s3_result = get_s3_client().list_objects_v2(**kwargs)
+            keys += [obj['Key'] for obj in s3_result.get('Contents', [])]
+            if not s3_result.get('IsTruncated'):
+                return keys
+            kwargs['ContinuationToken'] = s3_result['NextContinuationToken']
+
+    def keys(self, bucket_name, hour_prefix):
+        now = time.time()
+
+        # Memory
+        with self.lock:
+            entry = self.listings.get((bucket_name, hour_prefix))
+        if entry is not None and self.valid(hour_prefix, entry[0], now):
+            return entry[1]
+
+        # Disk (the listing is saved with the time it was fetched)
+        cache_file = self.cache_file(bucket_name, hour_prefix)
+        entry = self.read_cache(cache_file)
+        if entry is not None and self.valid(hour_prefix, entry[0], now):
+            fetched, keys = entry
+        # Server
+        else:
+            keys = self.list_remote(bucket_name, hour_prefix)
+            fetched = now
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = f'{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump({'fetched': fetched, 'keys': keys}, f)
+            os.replace(tmp_file, cache_file)
+
+        with self.lock:
+            self.listings[(bucket_name, hour_prefix)] = (fetched, keys)
+        return keys
+
+    def find(self, bucket_name, prefix):
+        # Keys starting with a full file prefix, e.g. .../OR_ABI-L2-RRQPEF-M6_G16_s202135200
+        hour_prefix = prefix[:prefix.rindex('/') + 1]
+        return [key for key in self.keys(bucket_name, hour_prefix) if key.startswith(prefix)]
+
+_index = ListingIndex()
+
+def get_listing_index():
+    return _index
+
+def list_hour_keys(product_name, date, bucket_name):
+
+    # All the keys of one hour "folder" of the bucket
+    prefix = f'{product_name}/{date.strftime("%Y")}/{date.strftime("%j")}/{date.strftime("%H")}/'
+    return get_listing_index().keys(bucket_name, prefix)
+
+def download_key(key, path_dest, bucket_name, verbose=True):
+
+    os.makedirs(path_dest, exist_ok=True)
+
+    file_name = key.split('/')[-1].split('.')[0]
+
+    # Download the file (to a temporary name first, so an interrupted download is never taken as complete)
+    if os.path.exists(f'{path_dest}/{file_name}.nc'):
+        if verbose:
+            print(f'File {path_dest}/{file_name}.nc exists')
+    else:
+        if verbose:
+            print(f'Downloading file {path_dest}/{file_name}.nc')
+        get_s3_client().download_file(bucket_name, key, f'{path_dest}/{file_name}.nc.part')
+        os.replace(f'{path_dest}/{file_name}.nc.part', f'{path_dest}/{file_name}.nc')
+    return file_name
+
+def download_keys(keys, path_dest, bucket_name, max_workers=MAX_WORKERS):
+
+    # Download many keys concurrently; files already on disk are skipped, so an interrupted run
+    # can simply be started again
+    pending = [key for key in keys if not os.path.exists(f'{path_dest}/{key.split("/")[-1].split(".")[0]}.nc')]
+    print(f'{len(keys) - len(pending)} of {len(keys)} files already downloaded')
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(download_key, key, path_dest, bucket_name, False) for key in pending]
+        for done, future in enumerate(as_completed(futures), 1):
+            future.result()
+            if done % 100 == 0 or done == len(futures):
+                print(f'Downloaded {done} of {len(futures)} files')
+
+    return [key.split('/')[-1].split('.')[0] for key in keys]
+
+def download_prefix(prefix, path_dest, bucket_name, label):
+
+    # Seach for the file in the listing of its hour
+    keys = get_listing_index().find(bucket_name, prefix)
+
+    # Check if there are files available
+    if not keys:
+        # There are no files
+        print(f'No files found for the date: {label}')
+        return -1
+
+    # There are files
+    for key in keys:
+        file_name = download_key(key, path_dest, bucket_name)
+    return f'{file_name}'
+
+#-----------------------------------------------------------------------------------------------------------
+
+def download_PROD(yyyymmddhhmn, product_name, path_dest, bucket_name):
+
+    date = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M')
+    year, day_of_year, hour, min = date.strftime('%Y'), date.strftime('%j'), date.strftime('%H'), date.strftime('%M')
+
+    # File structure
+    prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}-M6_G16_s{year}{day_of_year}{hour}{min}'
+
+    return download_prefix(prefix, path_dest, bucket_name, f'{yyyymmddhhmn}, Product-{product_name}')
+
+def download_GLM(yyyymmddhhmnss, path_dest, bucket_name):
+
+    date = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S')
+    year, day_of_year, hour, min, seg = date.strftime('%Y'), date.strftime('%j'), date.strftime('%H'), date.strftime('%M'), date.strftime('%S')
+
+    # File structure
+    product_name = "GLM-L2-LCFA"
+    prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}_G16_s{year}{day_of_year}{hour}{min}{seg}'
+
+    return download_prefix(prefix, path_dest, bucket_name, f'{yyyymmddhhmnss}, Product-{product_name}')
+
+def download_CMI(yyyymmddhhmn, band, path_dest, bucket_name='noaa-goes16'):
+
+    date = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M')
+    year, day_of_year, hour, min = date.strftime('%Y'), date.strftime('%j'), date.strftime('%H'), date.strftime('%M')
+
+    # File structure
+    product_name = 'ABI-L2-CMIPF'
+    prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}-M6C{int(band):02.0f}_G16_s{year}{day_of_year}{hour}{min}'
+
+    return download_prefix(prefix, path_dest, bucket_name, f'{yyyymmddhhmn}, Band-{band}')
+
+def download_range(product_name, date_ini, date_end, path_dest, bucket_name, max_workers=MAX_WORKERS, key_filter=None):
+
+    # Bulk mode: list every hour once and download all the files of the product that start
+    # between date_ini and date_end (and, if given, for which key_filter(key) is true)
+    keys = []
+    hour = date_ini.replace(minute=0, second=0, microsecond=0)
+    while (hour <= date_end):
+        for key in list_hour_keys(product_name, hour, bucket_name):
+            if date_ini <= file_start_time(key) <= date_end and (key_filter is None or key_filter(key)):
+                keys.append(key)
+        hour = hour + timedelta(hours=1)
+
+    if not keys:
+        print(f'No files found between {date_ini} and {date_end}, Product-{product_name}')
+
+    # Sorted by scan start time
+    keys.sort(key=file_start_time)
+    return download_keys(keys, path_dest, bucket_name, max_workers)
+
+def download_GLM_range(date_ini, date_end, path_dest, bucket_name, max_workers=MAX_WORKERS):
+    return download_range("GLM-L2-LCFA", date_ini, date_end, path_dest, bucket_name, max_workers)
@@ -0,0 +1,217 @@
+# GOES-16 fixed grid: conversion between lat / lon, scan angles and indices of the ABI arrays
+# (GOES-R Product Definition and User's Guide, volume 5, section 4.2.8)
+#
+# The projection parameters are read once from the goes_imagery_projection variable of a file
+# (or taken from the GOES-16 defaults) and the derived constants are computed in the constructor.
+# All the methods work with numbers or with NumPy arrays of any shape.
+
+# Required modules
+from functools import lru_cache                       # Cache of the inverse tables
+import numpy as np                                    # Scientific computing with Python
+
+#-----------------------------------------------------------------------------------------------------------
+
+class GoesProjection:
+
+    def __init__(self, xscale, xoffset, yscale, yoffset, shape=None,
+                 req=6378137.0, rpol=6356752.31414, perspective_point_height=35786023.0, lambda0=-75.0):
+        # goes_imagery_projection:semi_major_axis and semi_minor_axis (meters)
+        self.req = float(req)
+        self.rpol = float(rpol)
+        # goes_imagery_projection:perspective_point_height + goes_imagery_projection:semi_major_axis
+        self.H = float(perspective_point_height) + self.req
+        # goes_imagery_projection:longitude_of_projection_origin (degrees)
+        self.lambda0 = np.deg2rad(float(lambda0))
+
+        # x / y scale and offset of the grid (radians) and its size (lines, columns)
+        self.xscale, self.xoffset = float(xscale), float(xoffset)
+        self.yscale, self.yoffset = float(yscale), float(yoffset)
+        self.shape = shape
+
+        # Constants used by every conversion
+        self.rpol2_req2 = (self.rpol * self.rpol) / (self.req * self.req)
+        self.req2_rpol2 = (self.req * self.req) / (self.rpol * self.rpol)
+        self.e2 = 1 - self.rpol2_req2
+        self.H2_req2 = self.H * self.H - self.req * self.req
+
+    @classmethod
+    def from_netcdf(cls, nc):
+
+        # Parameters of an ABI file opened with netCDF4
+        proj = nc.variables['goes_imagery_projection']
+        x, y = nc.variables['x'], nc.variables['y']
+        return cls(x.scale_factor, x.add_offset, y.scale_factor, y.add_offset, shape=(y.size, x.size),
+                   req=proj.semi_major_axis, rpol=proj.semi_minor_axis,
+                   perspective_point_height=proj.perspective_point_height,
+                   lambda0=proj.longitude_of_projection_origin)
+
+    @classmethod
+    def from_gdal(cls, img):
+
+        # Parameters of an ABI variable opened with GDAL (NETCDF:file.nc:var)
+        metadata = img.GetMetadata()
+        return cls(metadata['x#scale_factor'], metadata['x#add_offset'],
+                   metadata['y#scale_factor'], metadata['y#add_offset'], shape=(img.RasterYSize, img.RasterXSize),
+                   req=metadata['goes_imagery_projection#semi_major_axis'],
+                   rpol=metadata['goes_imagery_projection#semi_minor_axis'],
+                   perspective_point_height=metadata['goes_imagery_projection#perspective_point_height'],
+                   lambda0=metadata['goes_imagery_projection#longitude_of_projection_origin'])
+
+    def key(self):
+        return (self.xscale, self.xoffset, self.yscale, self.yoffset, self.shape,
+                self.req, self.rpol, self.H, self.lambda0)
+
+    def latlon2xy(self, lat, lon):
+
+        # Convert to radians
+        latRad = np.deg2rad(np.asarray(lat, dtype=np.float64))
+        lonRad = np.deg2rad(np.asarray(lon, dtype=np.float64))
+
+        # (1) geocentric latitude
+        Phi_c = np.arctan(self.rpol2_req2 * np.tan(latRad))
+        cos_Phi_c = np.cos(Phi_c)
+        # (2) geocentric distance to the point on the ellipsoid
+        rc = self.rpol / np.sqrt(1 - self.e2 * cos_Phi_c * cos_Phi_c)
+        # (3) sx
+        sx = self.H - rc * cos_Phi_c * np.cos(lonRad - self.lambda0)
+        # (4) sy
+        sy = -rc * cos_Phi_c * np.sin(lonRad - self.lambda0)
+        # (5)
+        sz = rc * np.sin(Phi_c)
+
+        # x,y
+        x = np.arcsin(-sy / np.sqrt(sx * sx + sy * sy + sz * sz))
+        y = np.arctan(sz / sx)
+
+        # Points that the satellite can't see
+        hidden = self.H * (self.H - sx) < sy * sy + self.req2_rpol2 * sz * sz
+        x = np.where(hidden, np.nan, x)
+        y = np.where(hidden, np.nan, y)
+
+        return scalar(x), scalar(y)
+
+    def xy2latlon(self, x, y):
+
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        sin_x, cos_x = np.sin(x), np.cos(x)
+        sin_y, cos_y = np.sin(y), np.cos(y)
+
+        # Distance from the satellite to the point (NaN outside the disk)
+        a = sin_x * sin_x + cos_x * cos_x * (cos_y * cos_y + self.req2_rpol2 * sin_y * sin_y)
+        b = -2 * self.H * cos_x * cos_y
+        with np.errstate(invalid='ignore'):
+            rs = (-b - np.sqrt(b * b - 4 * a * self.H2_req2)) / (2 * a)
+
+        sx = rs * cos_x * cos_y
+        sy = -rs * sin_x
+        sz = rs * cos_x * sin_y
+
+        lat = np.rad2deg(np.arctan(self.req2_rpol2 * sz / np.sqrt((self.H - sx) ** 2 + sy * sy)))
+        lon = np.rad2deg(self.lambda0 - np.arctan(sy / (self.H - sx)))
+        return scalar(lat), scalar(lon)
+
+    def geo2grid(self, lat, lon):
+
+        # Line and column of the positions in the array (-1 for the points outside the disk)
+        x, y = self.latlon2xy(lat, lon)
+        col = (np.asarray(x) - self.xoffset) / self.xscale
+        lin = (np.asarray(y) - self.yoffset) / self.yscale
+
+        valid = np.isfinite(lin) & np.isfinite(col)
+        lin = np.where(valid, np.trunc(lin), -1).astype(np.int64)
+        col = np.where(valid, np.trunc(col), -1).astype(np.int64)
+        return scalar(lin), scalar(col)
+
+    def window(self, extent, margin=2, samples=101):
+
+        # Smallest block of lines and columns (first, last + 1) of the grid that covers the
+        # extent = [min lon, min lat, max lon, max lat], found by converting a mesh of points of the extent
+        if self.shape is None:
+            raise ValueError('The grid shape is needed to compute a window')
+        lats, lons = np.meshgrid(np.linspace(extent[1], extent[3], samples),
+                                 np.linspace(extent[0], extent[2], samples))
+        x, y = self.latlon2xy(lats, lons)
+        col = (x - self.xoffset) / self.xscale
+        lin = (y - self.yoffset) / self.yscale
+        valid = np.isfinite(lin) & np.isfinite(col)
+        if not valid.any():
+            raise ValueError(f'The extent {extent} is not seen by the satellite')
+
+        nlin, ncol = self.shape
+        lin0 = max(int(np.floor(lin[valid].min())) - margin, 0)
+        lin1 = min(int(np.ceil(lin[valid].max())) + margin + 1, nlin)
+        col0 = max(int(np.floor(col[valid].min())) - margin, 0)
+        col1 = min(int(np.ceil(col[valid].max())) + margin + 1, ncol)
+        return lin0, lin1, col0, col1
+
+    def subset(self, lin0, lin1, col0, col1):
+
+        # Grid of a block of lines and columns of this grid
+        return GoesProjection(self.xscale, self.xoffset + col0 * self.xscale,
+                              self.yscale, self.yoffset + lin0 * self.yscale, shape=(lin1 - lin0, col1 - col0),
+                              req=self.req, rpol=self.rpol, perspective_point_height=self.H - self.req,
+                              lambda0=np.rad2deg(self.lambda0))
+
+    def nadir_resolution(self):
+        # Size of the pixel below the satellite, in degrees
+        return np.rad2deg(abs(self.xscale) * (self.H - self.req) / self.req)
+
+    def grid2latlon(self):
+
+        # lat / lon of the center of every pixel of the grid (float32 tables, cached per grid)
+        if self.shape is None:
+            raise ValueError('The grid shape is needed to build the lat / lon tables')
+        return inverse_tables(self)
+
+def scalar(array):
+    # Numbers in, numbers out
+    return array[()] if np.ndim(array) == 0 else array
+
+class CachedProjection:
+
+    # Hashable wrapper, so lru_cache only compares the parameters of the grid
+    def __init__(self, projection):
+        self.projection = projection
+
+    def __hash__(self):
+        return hash(self.projection.key())
+
+    def __eq__(self, other):
+        return self.projection.key() == other.projection.key()
+
+@lru_cache(maxsize=4)
+def cached_inverse_tables(cached):
+    projection = cached.projection
+    nlin, ncol = projection.shape
+    x = projection.xoffset + projection.xscale * np.arange(ncol)
+    y = projection.yoffset + projection.yscale * np.arange(nlin)
+    lats = np.empty((nlin, ncol), dtype=np.float32)
+    lons = np.empty((nlin, ncol), dtype=np.float32)
+    # Line by line, to keep the float64 temporaries small
+    for i in range(nlin):
+        lats[i], lons[i] = projection.xy2latlon(x, np.full(ncol, y[i]))
+    lats.flags.writeable = False
+    lons.flags.writeable = False
+    return lats, lons
+
+def inverse_tables(projection):
+    return cached_inverse_tables(CachedProjection(projection))
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Grid of the NDVI arrays provided by CEPAGRI (1 km scan angles)
+ndvi_projection = GoesProjection(1.4e-03, -0.151865, -1.4e-03, 0.151865)
+
+# GOES-16 full disk with the default parameters (used when there is no file at hand)
+goes16_projection = GoesProjection(5.6e-05, -0.151844, -5.6e-05, 0.151844, shape=(5424, 5424))
+
+def projection(nc):
+    return GoesProjection.from_netcdf(nc)
+
+def latlon2xy(lat, lon):
+    return goes16_projection.latlon2xy(lat, lon)
+
+# Functions to convert lat / lon extent to array indices
+def geo2grid(lat, lon, nc):
+    return projection(nc).geo2grid(lat, lon)
@@ -1,81 +1,57 @@
-from PIL import Image
+# Suavizacao das texturas de vento (DMW): cada pixel recebe a media ponderada dos vizinhos nas
+# 8 direcoes (horizontal, vertical e diagonais) ate 3 pixels de distancia, com peso 7, 6 e 5
+# para as distancias 1, 2 e 3. Nas bordas a media usa so os vizinhos que existem.
 
-def bilinear():
-    im = Image.open(f'C:\\Gaia Senses\\python_goes\\DMW\\14.png') 
-    pix = im.load()
-    width, height = im.size
-    i = 0
-    for pixel_x in range(width):
-        for pixel_y in range(height):
-            sum = 0
-            peso = 7
-            total = 0
-            for k in range(1, 4):
-                if (403 > (pixel_x + k) > 0) and (389 > (pixel_y + k) > 0):
-                    sum += ((pix[(pixel_x + k), (pixel_y + k)][i]) * peso)
-                    total += peso
-                if (403 > (pixel_x - k) > 0) and (389 > (pixel_y - k) > 0):
-                    sum += ((pix[(pixel_x - k), (pixel_y - k)][i]) * peso)
-                    total += peso
-                if (403 > (pixel_x - k) > 0) and (389 > (pixel_y + k) > 0):
-                    sum += (pix[(pixel_x - k), (pixel_y + k)][i] * peso)
-                    total += peso
-                if (403 > (pixel_x + k) > 0) and (389 > (pixel_y - k) > 0):
-                    sum += (pix[(pixel_x + k), (pixel_y - k)][i] * peso)
-                    total += peso
-                if (403 > (pixel_x + k) > 0) and (389 > (pixel_y) > 0):
-                    sum += (pix[(pixel_x + k), (pixel_y)][i] * peso) 
-                    total += peso
-                if (403 > (pixel_x - k) > 0) and (389 > (pixel_y) > 0):
-                    sum += (pix[(pixel_x - k), (pixel_y)][i] * peso)
-                    total += peso
-                if (403 > (pixel_x) > 0) and (389 > (pixel_y - k) > 0):
-                    sum += (pix[(pixel_x), (pixel_y - k)][i] * peso)
-                    total += peso
-                if (403 > (pixel_x) > 0) and (389 > (pixel_y + k) > 0):
-                    sum += (pix[(pixel_x), (pixel_y + k)][i] * peso)
-                    total += peso
-                peso -= 1
-              
-            if total != 0:
-                pix[pixel_x, pixel_y] = (int(sum/total), pix[pixel_x, pixel_y][1], 0)
+# Required modules
+import numpy as np                                    # Scientific computing with Python
 
-    i = 1
-    for pixel_x in range(width):
-        for pixel_y in range(height):
-            sum = 0
-            peso = 7
-            total = 0
-            for k in range(1, 4):
-                if (403 > (pixel_x + k) > 0) and (389 > (pixel_y + k) > 0):
-                    sum += ((pix[(pixel_x + k), (pixel_y + k)][i]) * peso)
-                    total += peso
-                if (403 > (pixel_x - k) > 0) and (389 > (pixel_y - k) > 0):
-                    sum += ((pix[(pixel_x - k), (pixel_y - k)][i]) * peso)
-                    total += peso
-                if (403 > (pixel_x - k) > 0) and (389 > (pixel_y + k) > 0):
-                    sum += (pix[(pixel_x - k), (pixel_y + k)][i] * peso)
-                    total += peso
-                if (403 > (pixel_x + k) > 0) and (389 > (pixel_y - k) > 0):
-                    sum += (pix[(pixel_x + k), (pixel_y - k)][i] * peso)
-                    total += peso
-                if (403 > (pixel_x + k) > 0) and (389 > (pixel_y) > 0):
-                    sum += (pix[(pixel_x + k), (pixel_y)][i] * peso) 
-                    total += peso
-                if (403 > (pixel_x - k) > 0) and (389 > (pixel_y) > 0):
-                    sum += (pix[(pixel_x - k), (pixel_y)][i] * peso)
-                    total += peso
-                if (403 > (pixel_x) > 0) and (389 > (pixel_y - k) > 0):
-                    sum += (pix[(pixel_x), (pixel_y - k)][i] * peso)
-                    total += peso
-                if (403 > (pixel_x) > 0) and (389 > (pixel_y + k) > 0):
-                    sum += (pix[(pixel_x), (pixel_y + k)][i] * peso)
-                    total += peso
-                peso -= 1
-              
-            if total != 0:
-                pix[pixel_x, pixel_y] = (pix[pixel_x, pixel_y][0], int(sum/total), 0)
+# Dependencia opcional, so para ler e gravar os PNG (bilinear)
+try:
+    from PIL import Image                             # Python Imaging Library
+except ImportError:
+    Image = None
 
-    im.save(f'C:\\Gaia Senses\\python_goes\\DMW\\15.png', transparent=True, bbox_inches='tight')
+#-----------------------------------------------------------------------------------------------------------
 
-bilinear()
\ No newline at end of file
+# Vizinhanca em estrela: ((deslocamento de linha, deslocamento de coluna), peso)
+DIRECOES = [(1, 1), (-1, -1), (1, -1), (-1, 1), (0, 1), (0, -1), (-1, 0), (1, 0)]
+RAIO = 3
+VIZINHOS = [((k * dlin, k * dcol), 8 - k) for k in range(1, RAIO + 1) for dlin, dcol in DIRECOES]
+
+def suaviza(image):
+
+    # Media ponderada dos vizinhos de cada pixel (sem o proprio pixel), para todos os canais de uma
+    # vez; image eh (linhas, colunas) ou (linhas, colunas, canais), de qualquer tamanho.
+    # A estrela nao eh separavel (diagonais), entao eh a soma das 24 fatias deslocadas da imagem
+    values = np.asarray(image, dtype=np.float32)
+    nlin, ncol = values.shape[:2]
+    borda = [(RAIO, RAIO), (RAIO, RAIO)] + [(0, 0)] * (values.ndim - 2)
+    padded = np.pad(values, borda)
+    dentro = np.pad(np.ones((nlin, ncol), dtype=np.float32), RAIO)
+
+    soma = np.zeros_like(values)
+    total = np.zeros((nlin, ncol), dtype=np.float32)
+    for (dlin, dcol), peso in VIZINHOS:
+        lins = slice(RAIO + dlin, RAIO + dlin + nlin)
+        cols = slice(RAIO + dcol, RAIO + dcol + ncol)
+        soma += peso * padded[lins, cols]
+        total += peso * dentro[lins, cols]
+
+    # Normalizacao pelos pesos dos vizinhos dentro da imagem (pixel sem vizinhos fica como esta)
+    if values.ndim > 2:
+        total = total[..., np.newaxis]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, soma / total, values)
+
+def bilinear(entrada='C:\\Gaia Senses\\python_goes\\DMW\\14.png', saida='C:\\Gaia Senses\\python_goes\\DMW\\15.png'):
+
+    # Suaviza as componentes x (R) e y (G) da textura; o canal B fica zerado
+    if Image is None:
+        raise ImportError('Pillow is required to read and write the textures (pip install pillow)')
+    im = np.asarray(Image.open(entrada).convert('RGB'))
+    resultado = np.zeros_like(im)
+    resultado[:, :, :2] = np.trunc(suaviza(im[:, :, :2]))
+    Image.fromarray(resultado).save(saida)
+
+if __name__ == '__main__':
+    bilinear()
@@ -5,119 +5,16 @@ import cartopy, cartopy.crs as ccrs                   # Plot maps
 from datetime import datetime                         # Basic Dates and time types
 import os                                             # Miscellaneous operating system interfaces
 from osgeo import gdal                                # Python bindings for GDAL
-from osgeo import osr                                 # Python bindings for GDAL
 import numpy as np                                    # Scientific computing with Python
 from matplotlib import cm                             # Colormap handling utilities
 import cartopy.io.shapereader as shpreader            # Import shapefiles
-import boto3                                          # Amazon Web Services (AWS) SDK for Python
-from botocore import UNSIGNED                         # boto3 config
-from botocore.config import Config                    # boto3 config
+from goes_fetch import download_PROD, download_GLM    # Shared GOES-16 download layer
+from reprojection import reproject                    # Cached GOES -> lat/lon warp
+from abi_reader import abi_window, read_window, decode_abi # Windowed reading of ABI variables
 gdal.PushErrorHandler('CPLQuietErrorHandler')         # Ignore GDAL warnings
 
 #-----------------------------------------------------------------------------------------------------------
 
-def reproject(file_name, ncfile, array, extent, undef):
-
-    # Read the original file projection and configure the output projection
-    source_prj = osr.SpatialReference()
-    source_prj.ImportFromProj4(ncfile.GetProjectionRef())
-    target_prj = osr.SpatialReference()
-    target_prj.ImportFromProj4("+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs")
-   
-    # Reproject the data
-    GeoT = ncfile.GetGeoTransform()
-    driver = gdal.GetDriverByName('MEM')
-    raw = driver.Create('raw', array.shape[0], array.shape[1], 1, gdal.GDT_Float32)
-    raw.SetGeoTransform(GeoT)
-    raw.GetRasterBand(1).WriteArray(array)
-
-    # Define the parameters of the output file  
-    kwargs = {'format': 'netCDF', \
-            'srcSRS': source_prj, \
-            'dstSRS': target_prj, \
-            'outputBounds': (extent[0], extent[3], extent[2], extent[1]), \
-            'outputBoundsSRS': target_prj, \
-            'outputType': gdal.GDT_Float32, \
-            'srcNodata': undef, \
-            'dstNodata': 'nan', \
-            'resampleAlg': gdal.GRA_NearestNeighbour}
-
-    # Write the reprojected file on disk
-    gdal.Warp(file_name, raw, **kwargs)
-
-#-----------------------------------------------------------------------------------------------------------
-
-def download_PROD(yyyymmddhhmn, product_name, path_dest, bucket_name):
-
-  os.makedirs(path_dest, exist_ok=True)
-
-  year = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%Y')
-  day_of_year = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%j')
-  hour = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%H')
-  min = datetime.strptime(yyyymmddhhmn, '%Y%m%d%H%M').strftime('%M')
-
-  # Initializes the S3 client
-  s3_client = boto3.client('s3', config=Config(signature_version=UNSIGNED))
-
-  # File structure
-  prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}-M6_G16_s{year}{day_of_year}{hour}{min}'
-
-  # Seach for the file on the server
-  s3_result = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, Delimiter = "/")
-
-  # Check if there are files available
-  if 'Contents' not in s3_result: 
-    print(f'No files found for the date: {yyyymmddhhmn}, Product-{product_name}')
-    return -1
-  else:
-    for obj in s3_result['Contents']: 
-      key = obj['Key']
-      file_name = key.split('/')[-1].split('.')[0]
-      if os.path.exists(f'{path_dest}/{file_name}.nc'):
-        print(f'File {path_dest}/{file_name}.nc exists')
-      else:
-        print(f'Downloading file {path_dest}/{file_name}.nc')
-        s3_client.download_file(bucket_name, key, f'{path_dest}/{file_name}.nc')
-  return f'{file_name}'
-
-#-----------------------------------------------------------------------------------------------------------
-
-def download_GLM(yyyymmddhhmnss, path_dest, bucket_name):
-
-  os.makedirs(path_dest, exist_ok=True)
-
-  year = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%Y')
-  day_of_year = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%j')
-  hour = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%H')
-  min = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%M')
-  seg = datetime.strptime(yyyymmddhhmnss, '%Y%m%d%H%M%S').strftime('%S')
-
-  # Initializes the S3 client
-  s3_client = boto3.client('s3', config=Config(signature_version=UNSIGNED))
-
-  # File structure
-  product_name = "GLM-L2-LCFA"
-  prefix = f'{product_name}/{year}/{day_of_year}/{hour}/OR_{product_name}_G16_s{year}{day_of_year}{hour}{min}{seg}'
-
-  # Seach for the file on the server
-  s3_result = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, Delimiter = "/")
-
-  # Check if there are files available
-  if 'Contents' not in s3_result: 
-    print(f'No files found for the date: {yyyymmddhhmnss}, Product-{product_name}')
-    return -1
-  else:
-    for obj in s3_result['Contents']: 
-      key = obj['Key']
-      file_name = key.split('/')[-1].split('.')[0]
-      if os.path.exists(f'{path_dest}/{file_name}.nc'):
-        print(f'File {path_dest}/{file_name}.nc exists')
-      else:
-        print(f'Downloading file {path_dest}/{file_name}.nc')
-        s3_client.download_file(bucket_name, key, f'{path_dest}/{file_name}.nc')
-  return f'{file_name}'
-
-#-----------------------------------------------------------------------------------------------------------
 
 # Input and output directories
 input = "Samples"; os.makedirs(input, exist_ok=True)
@@ -132,7 +29,6 @@ var = 'RRQPE'
 rate_abi = "Rainfall Rate mm"
 title = "G-16 Abi + GLM"
 
-array = np.zeros((5424,5424))
 minute = int(datetime.now().strftime('%M'))
 yyyymmddhhmn = datetime.now().strftime('%Y%m%d%H' + str(minute - (minute % 10))) 
 
@@ -149,27 +45,17 @@ undef = float(metadata.get(var + '#_FillValue'))
 dtime = metadata.get('NC_GLOBAL#time_coverage_start')
 unit = metadata.get(var + '#units')
 
-# Load the data
-ds = img.ReadAsArray(0, 0, img.RasterXSize, img.RasterYSize).astype(float)
-ds_dqf = dqf.ReadAsArray(0, 0, dqf.RasterXSize, dqf.RasterYSize).astype(float)
-
-# Remove undef
-ds[ds == undef] = np.nan
-
-# Apply the scale and offset 
-ds = (ds * scale + offset)
-
-# Apply NaN's where the quality flag is greater than 1
-ds[ds_dqf > 1] = np.nan
+# Load only the part of the disk that covers the extent
+window, projection = abi_window(img, extent)
+ds = read_window(img, window)
+ds_dqf = read_window(dqf, window)
 
-# Reproject the file
-array = np.nansum(np.dstack((array, ds)),2)
-filename = f'{output}/{product_name}_{yyyymmddhhmn}.nc'
-reproject(filename, img, array, extent, undef)
+# Remove undef, apply the scale and offset and apply NaN's where the quality flag is greater than 1
+ds = decode_abi(ds, scale, offset, undef, ds_dqf, dqf_max=1)
 
-# Open the reprojected GOES-R image
-file = Dataset(filename)
-abi = file.variables['Band1'][:]
+# Replace the NaN's by zeros (in place) and reproject the file
+array = np.nan_to_num(ds, copy=False)
+abi, geotransform = reproject(projection, array, extent, undef)
 
 #-----------------------------------------------------------------------------------------------------------
 # Get the GLM Data
@@ -0,0 +1,78 @@
+# Extraction of the values of many (lat, lon) positions from one decoded scene
+#
+# The scene is read once and all the positions are converted to pixels and gathered together,
+# optionally with a statistic of the neighbourhood (e.g. the max within N pixels).
+# extract_native reads the positions straight from the GOES fixed grid of the original file,
+# without reprojecting the disk, and only reads the window of the array around them.
+
+# Required modules
+import warnings                                       # Warning control
+import numpy as np                                    # Scientific computing with Python
+from goes_projection import geo2grid                  # lat / lon to fixed grid indices
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Statistics accepted for the neighbourhood
+STATS = {'max': np.nanmax, 'min': np.nanmin, 'mean': np.nanmean}
+
+def latlon2pixel(transform, lats, lons):
+
+    # Row and column of each position in a lat/lon grid with the given GDAL geotransform
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    cols = np.floor((lons - transform[0]) / transform[1]).astype(np.int64)
+    rows = np.floor((transform[3] - lats) / -transform[5]).astype(np.int64)
+    return rows, cols
+
+def gather(data, rows, cols, radius=0, stat='max'):
+
+    # Values at (rows, cols); NaN for the positions outside the array (or masked)
+    nrow, ncol = data.shape
+
+    # Value of every pixel of the (2 * radius + 1) x (2 * radius + 1) window around each position
+    window = np.full((rows.size, (2 * radius + 1) ** 2), np.nan)
+    offsets = [(drow, dcol) for drow in range(-radius, radius + 1) for dcol in range(-radius, radius + 1)]
+    for i, (drow, dcol) in enumerate(offsets):
+        r, c = rows + drow, cols + dcol
+        inside = (r >= 0) & (r < nrow) & (c >= 0) & (c < ncol)
+        window[inside, i] = np.ma.filled(np.ma.asarray(data[r[inside], c[inside]], dtype=np.float64), np.nan)
+
+    if radius == 0:
+        return window[:, 0]
+
+    # Statistic of the neighbourhood, ignoring NaNs (all-NaN windows give NaN)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return STATS[stat](window, axis=1)
+
+def extract_points(data, transform, lats, lons, radius=0, stat='max'):
+
+    # Values of the positions (lats, lons) in a reprojected lat/lon scene
+    rows, cols = latlon2pixel(transform, np.atleast_1d(lats), np.atleast_1d(lons))
+    return gather(data, rows, cols, radius, stat)
+
+def extract_native(nc, var, lats, lons, radius=0, stat='max', dqf_max=None):
+
+    # Values of the positions (lats, lons) read from the native grid of an ABI file opened with
+    # netCDF4 (scale, offset and fill value are applied by netCDF4)
+    rows, cols = geo2grid(np.atleast_1d(lats), np.atleast_1d(lons), nc)
+    nrow, ncol = nc.variables[var].shape
+
+    # Positions outside the disk
+    values = np.full(rows.size, np.nan)
+    inside = (rows >= 0) & (rows < nrow) & (cols >= 0) & (cols < ncol)
+    if not inside.any():
+        return values
+
+    # Smallest window of the array with all the positions and their neighbourhood
+    row0, row1 = max(rows[inside].min() - radius, 0), min(rows[inside].max() + radius + 1, nrow)
+    col0, col1 = max(cols[inside].min() - radius, 0), min(cols[inside].max() + radius + 1, ncol)
+    data = nc.variables[var][row0:row1, col0:col1]
+
+    # Apply NaN's where the quality flag is greater than dqf_max
+    if dqf_max is not None:
+        data = np.ma.filled(np.ma.asarray(data, dtype=np.float64), np.nan)
+        data[nc.variables['DQF'][row0:row1, col0:col1] > dqf_max] = np.nan
+
+    values[inside] = gather(data, rows[inside] - row0, cols[inside] - col0, radius, stat)
+    return values
@@ -0,0 +1,31 @@
+# Rainfall accumulation from the GOES-16 Rainfall Rate (ABI-L2-RRQPEF) scans
+#
+# RRQPE is a rate (mm/h) valid at the time of each scan. The total of a period is the sum of the
+# rates of all its scans times the scan interval (10 min in mode 6: 6 scans per hour, 144 per day).
+# The scans are accumulated on the native grid (only the window that covers the extent) and
+# the total is reprojected only once, at the end.
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import re                                             # Regular expressions
+from scans import ScanAccumulator                     # Accumulation of the scans of a period
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Interval between full disk scans of each ABI scan mode (minutes)
+SCAN_MINUTES = {'3': 15, '4': 5, '6': 10}
+
+def scan_hours(file_name):
+
+    # Interval represented by one scan, in hours (e.g. OR_ABI-L2-RRQPEF-M6_G16_s... -> 10 / 60)
+    mode = re.search(r'-M(\d)', os.path.basename(file_name)).group(1)
+    return SCAN_MINUTES[mode] / 60
+
+class RainfallAccumulator(ScanAccumulator):
+
+    def __init__(self, extent, product_name='ABI-L2-RRQPEF', var='RRQPE', dqf_max=1):
+        super().__init__(product_name, var, extent, dqf_max)
+
+    def weight(self, path):
+        # Rate in mm/h -> rainfall in mm
+        return scan_hours(path)
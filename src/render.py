@@ -0,0 +1,21 @@
+# Rendering of reprojected arrays as PNG images
+
+# Required modules
+import numpy as np                                    # Scientific computing with Python
+from matplotlib import cm                             # Colormap handling utilities
+from PIL import Image
+
+#-----------------------------------------------------------------------------------------------------------
+
+def save_png(data, file_name, colormap_name='binary'):
+
+    # Modify the colormap to zero values are white
+    colormap = cm.get_cmap(colormap_name, 240)
+    newcolormap = colormap(np.linspace(0, 1, 240))
+    newcolormap[:1, :] = np.array([1, 1, 1, 1])
+    cmap = cm.colors.ListedColormap(newcolormap)
+
+    scaled = cmap(data)
+    scaled = np.uint8(scaled) * 255
+    im = Image.fromarray(scaled)
+    im.save(file_name)
@@ -0,0 +1,125 @@
+# Reprojection of GOES-16 ABI arrays (fixed grid) to a regular lat/lon grid
+#
+# The source grid and the output extent don't change between scans, so the nearest neighbour
+# source pixel of every output pixel is computed only once per (source grid, projection, extent,
+# output resolution) and stored on disk. Reprojecting a new scan is then a single gather of the array,
+# done in memory (writing the result as NetCDF is optional).
+
+# Required modules
+import hashlib                                  # Cache keys
+import os                                       # Miscellaneous operating system interfaces
+import threading                                # Thread-based parallelism
+from osgeo import gdal                          # Python bindings for GDAL
+from osgeo import osr                           # Python bindings for GDAL
+import numpy as np                              # Scientific computing with Python
+from goes_projection import GoesProjection      # GOES fixed grid geometry
+gdal.PushErrorHandler('CPLQuietErrorHandler')   # Ignore GDAL warnings
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Where the warp maps are kept
+WARP_CACHE_DIR = os.environ.get('GOES_WARP_CACHE', '.warp_cache')
+
+_warp_maps = {}
+_warp_lock = threading.Lock()
+
+class WarpMap:
+
+    # Source line and column (-1 outside the disk) of every pixel of the output lat/lon grid
+
+    def __init__(self, rows, cols, geotransform):
+        self.rows = rows
+        self.cols = cols
+        self.geotransform = geotransform
+        self.valid = rows >= 0
+
+    @classmethod
+    def build(cls, projection, extent, res):
+
+        # Output grid: extent = [min lon, min lat, max lon, max lat], pixels of res degrees
+        ncol = int(round((extent[2] - extent[0]) / res))
+        nrow = int(round((extent[3] - extent[1]) / res))
+        geotransform = (float(extent[0]), float(res), 0.0, float(extent[3]), 0.0, -float(res))
+
+        # Nearest source pixel of the center of every output pixel
+        lons = extent[0] + res * (np.arange(ncol) + 0.5)
+        lats = extent[3] - res * (np.arange(nrow) + 0.5)
+        nlin_src, ncol_src = projection.shape
+        rows = np.full((nrow, ncol), -1, dtype=np.int16)
+        cols = np.full((nrow, ncol), -1, dtype=np.int16)
+        for i in range(nrow):
+            x, y = projection.latlon2xy(np.full(ncol, lats[i]), lons)
+            with np.errstate(invalid='ignore'):
+                col = np.rint((x - projection.xoffset) / projection.xscale)
+                row = np.rint((y - projection.yoffset) / projection.yscale)
+            inside = (row >= 0) & (row < nlin_src) & (col >= 0) & (col < ncol_src)
+            rows[i, inside] = row[inside]
+            cols[i, inside] = col[inside]
+        return cls(rows, cols, geotransform)
+
+    def apply(self, array, undef=None):
+
+        # Gather the source array into the output grid (NaN outside the disk and on undef)
+        out = np.full(self.rows.shape, np.nan, dtype=np.float32)
+        out[self.valid] = array[self.rows[self.valid], self.cols[self.valid]]
+        if undef is not None:
+            out[out == undef] = np.nan
+        return out
+
+def warp_key(projection, extent, res):
+    key = repr((projection.key(), tuple(float(value) for value in extent), float(res)))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def get_warp_map(projection, extent, res=None, cache_dir=WARP_CACHE_DIR):
+
+    # Warp map from memory, from disk, or computed (and stored) the first time
+    if res is None:
+        res = projection.nadir_resolution()
+    key = warp_key(projection, extent, res)
+
+    with _warp_lock:
+        if key in _warp_maps:
+            return _warp_maps[key]
+
+        cache_file = os.path.join(cache_dir, f'warp_{key}.npz')
+        if os.path.exists(cache_file):
+            data = np.load(cache_file)
+            warp = WarpMap(data['rows'], data['cols'], tuple(float(value) for value in data['geotransform']))
+        else:
+            warp = WarpMap.build(projection, extent, res)
+            os.makedirs(cache_dir, exist_ok=True)
+            # Temporary name per process, several processes may build the same map at once
+            tmp_file = f'{cache_file}.{os.getpid()}.tmp.npz'
+            np.savez(tmp_file, rows=warp.rows, cols=warp.cols, geotransform=np.array(warp.geotransform))
+            os.replace(tmp_file, cache_file)
+
+        _warp_maps[key] = warp
+        return warp
+
+#-----------------------------------------------------------------------------------------------------------
+
+def write_netcdf(file_name, data, geotransform):
+
+    # Write a lat/lon array on disk (same layout as the files written by gdal.Warp)
+    target_prj = osr.SpatialReference()
+    target_prj.ImportFromProj4("+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs")
+
+    raw = gdal.GetDriverByName('MEM').Create('raw', data.shape[1], data.shape[0], 1, gdal.GDT_Float32)
+    raw.SetGeoTransform(geotransform)
+    raw.SetProjection(target_prj.ExportToWkt())
+    raw.GetRasterBand(1).SetNoDataValue(float('nan'))
+    raw.GetRasterBand(1).WriteArray(data)
+    gdal.GetDriverByName('netCDF').CreateCopy(file_name, raw)
+
+def reproject(projection, array, extent, undef=None, res=None, file_name=None):
+
+    # Reproject an ABI array, given the GoesProjection of its grid (e.g. of a window read with
+    # abi_reader) or the ABI variable opened with GDAL. The lat/lon array (north up) and its
+    # geotransform are returned; the array is also written on disk only if a file name is given
+    if not isinstance(projection, GoesProjection):
+        projection = GoesProjection.from_gdal(projection)
+    warp = get_warp_map(projection, extent, res)
+    data = warp.apply(array, undef)
+    if file_name is not None:
+        write_netcdf(file_name, data, warp.geotransform)
+    return data, warp.geotransform
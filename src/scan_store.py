@@ -0,0 +1,138 @@
+# Compact on-disk store of decoded ABI scans on the native grid
+#
+# Each scan is ingested once from the NetCDF file: the packed values (int16 / uint16, with the
+# pixels of bad quality already set to the fill value) of the window that covers the extent are
+# written as tiles of TILE x TILE pixels in a .npy file, next to a small JSON header with the
+# scale, offset, fill value and the fixed grid of the window.
+# The .npy is memory-mapped, so a point lookup reads one tile (8 KB) and a window read only the
+# tiles it touches, instead of decompressing the whole NetCDF variable.
+
+# Required modules
+import json                                           # JSON encoder and decoder
+import os                                             # Miscellaneous operating system interfaces
+import re                                             # Regular expressions
+import shutil                                         # High-level file operations
+import numpy as np                                    # Scientific computing with Python
+from netCDF4 import Dataset                           # Read / Write NetCDF4 files
+from goes_projection import GoesProjection            # GOES fixed grid geometry
+from abi_reader import decode_abi                     # float32 decode of the packed values
+from point_extract import gather                      # Values (and neighbourhood) of many positions
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Where the scans are kept and the size of the tiles (pixels)
+SCAN_STORE_DIR = os.environ.get('GOES_SCAN_STORE', 'Store')
+TILE = 64
+
+def packed_variable(variable, lin0, lin1, col0, col1):
+
+    # Packed values of a block of a netCDF4 variable, as unsigned when the variable is _Unsigned
+    variable.set_auto_maskandscale(False)
+    packed = variable[lin0:lin1, col0:col1]
+    undef = np.array(getattr(variable, '_FillValue', 0), dtype=packed.dtype)
+    if getattr(variable, '_Unsigned', 'false') == 'true' and packed.dtype.kind == 'i':
+        unsigned = np.dtype(f'u{packed.dtype.itemsize}')
+        packed, undef = packed.view(unsigned), undef.view(unsigned)
+    return packed, undef[()]
+
+def ingest_scan(path, var, extent=None, store_dir=SCAN_STORE_DIR, dqf_max=1, tile=TILE):
+
+    # Write the scan (only the window that covers the extent, or the full disk) in the store, once
+    # for each quality flag threshold
+    name = os.path.splitext(os.path.basename(path))[0]
+    scan_dir = os.path.join(store_dir, f'{name}_{var}' + ('' if dqf_max is None else f'_dqf{dqf_max}'))
+    if os.path.exists(os.path.join(scan_dir, 'header.json')):
+        return ScanStore(scan_dir)
+
+    nc = Dataset(path)
+    projection = GoesProjection.from_netcdf(nc)
+    if extent is None:
+        window = (0, projection.shape[0], 0, projection.shape[1])
+    else:
+        window = projection.window(extent)
+    projection = projection.subset(*window)
+
+    variable = nc.variables[var]
+    packed, undef = packed_variable(variable, *window)
+    if dqf_max is not None and 'DQF' in nc.variables:
+        dqf, _ = packed_variable(nc.variables['DQF'], *window)
+        packed[dqf > dqf_max] = undef
+
+    # Tiles: (tile lines, tile columns, tile, tile), the border tiles are completed with undef
+    nlin, ncol = packed.shape
+    ntlin, ntcol = -(-nlin // tile), -(-ncol // tile)
+    tiles = np.full((ntlin * tile, ntcol * tile), undef, dtype=packed.dtype)
+    tiles[:nlin, :ncol] = packed
+    tiles = tiles.reshape(ntlin, tile, ntcol, tile).swapaxes(1, 2)
+
+    header = {'var': var, 'units': getattr(variable, 'units', ''), 'time': getattr(nc, 'time_coverage_start', ''),
+              'shape': [nlin, ncol], 'tile': tile, 'dtype': packed.dtype.str,
+              'scale': float(getattr(variable, 'scale_factor', 1.0)),
+              'offset': float(getattr(variable, 'add_offset', 0.0)),
+              'undef': undef.item(), 'dqf_max': dqf_max, 'window': [int(value) for value in window],
+              'projection': {'xscale': projection.xscale, 'xoffset': projection.xoffset,
+                             'yscale': projection.yscale, 'yoffset': projection.yoffset,
+                             'req': projection.req, 'rpol': projection.rpol,
+                             'perspective_point_height': projection.H - projection.req,
+                             'lambda0': float(np.rad2deg(projection.lambda0))}}
+    nc.close()
+
+    # The header is written last: a scan without header is incomplete
+    os.makedirs(scan_dir, exist_ok=True)
+    np.save(os.path.join(scan_dir, 'tiles.npy'), np.ascontiguousarray(tiles))
+    with open(os.path.join(scan_dir, 'header.json.tmp'), 'w') as f:
+        json.dump(header, f)
+    os.replace(os.path.join(scan_dir, 'header.json.tmp'), os.path.join(scan_dir, 'header.json'))
+    return ScanStore(scan_dir)
+
+def prune_scans(scan_dir):
+
+    # Remove the scans of the store of the same product, variable and quality flag threshold as
+    # scan_dir that started before it (e.g. the previous scans of a service that keeps the latest)
+    store_dir, name = os.path.split(os.path.normpath(scan_dir))
+    series, start = re.sub(r'_s\d+_e\d+_c\d+', '', name), re.search(r'_s(\d+)', name)
+    if start is None:
+        return
+    for other in os.listdir(store_dir):
+        other_start = re.search(r'_s(\d+)', other)
+        if other_start and re.sub(r'_s\d+_e\d+_c\d+', '', other) == series and other_start.group(1) < start.group(1):
+            shutil.rmtree(os.path.join(store_dir, other), ignore_errors=True)
+
+class ScanStore:
+
+    def __init__(self, scan_dir):
+        self.scan_dir = scan_dir
+        with open(os.path.join(scan_dir, 'header.json')) as f:
+            self.header = json.load(f)
+        self.tiles = np.load(os.path.join(scan_dir, 'tiles.npy'), mmap_mode='r')
+        self.tile = self.header['tile']
+        self.shape = tuple(self.header['shape'])
+        self.scale, self.offset, self.undef = self.header['scale'], self.header['offset'], self.header['undef']
+        self.projection = GoesProjection(**self.header['projection'], shape=self.shape)
+
+    def __getitem__(self, index):
+
+        # Decoded values of the pixels (lines, columns), reading only their tiles
+        lins, cols = index
+        lins, cols = np.asarray(lins), np.asarray(cols)
+        packed = self.tiles[lins // self.tile, cols // self.tile, lins % self.tile, cols % self.tile]
+        return decode_abi(np.asarray(packed), self.scale, self.offset, self.undef)
+
+    def read_window(self, lin0, lin1, col0, col1):
+
+        # Decoded values of a block of lines and columns (of the stored window)
+        t = self.tile
+        block = self.tiles[lin0 // t:-(-lin1 // t), col0 // t:-(-col1 // t)]
+        block = block.swapaxes(1, 2).reshape(block.shape[0] * t, block.shape[1] * t)
+        lin, col = lin0 - (lin0 // t) * t, col0 - (col0 // t) * t
+        packed = block[lin:lin + lin1 - lin0, col:col + col1 - col0]
+        return decode_abi(packed, self.scale, self.offset, self.undef)
+
+    def read(self):
+        return self.read_window(0, self.shape[0], 0, self.shape[1])
+
+    def values(self, lats, lons, radius=0, stat='max'):
+
+        # Values of the positions (lats, lons); NaN outside the stored window
+        lins, cols = self.projection.geo2grid(np.atleast_1d(lats), np.atleast_1d(lons))
+        return gather(self, lins, cols, radius, stat)
@@ -0,0 +1,75 @@
+# Accumulation of the scans of an ABI product over a period (an hour, a day)
+#
+# The scans are read (only the window that covers the extent), decoded into a reused float32
+# buffer and added to a RasterAccumulator on the native grid; the result is reprojected only once.
+
+# Required modules
+from datetime import timedelta                        # Basic Dates and time types
+from osgeo import gdal                                # Python bindings for GDAL
+from goes_fetch import download_range                 # Shared GOES-16 download layer
+from abi_reader import abi_window, read_window, decode_abi # Windowed reading of ABI variables
+from accumulator import RasterAccumulator             # Running sum / count / max of many scans
+gdal.PushErrorHandler('CPLQuietErrorHandler')         # Ignore GDAL warnings
+
+#-----------------------------------------------------------------------------------------------------------
+
+class ScanAccumulator:
+
+    def __init__(self, product_name, var, extent, dqf_max=1):
+        self.product_name = product_name
+        self.var = var
+        self.extent = extent
+        self.dqf_max = dqf_max
+        self.accumulator = RasterAccumulator()
+        # Window of the disk and its fixed grid, found with the first scan
+        self.window = None
+        self.projection = None
+        # Decoded scan, reused by every scan
+        self.buffer = None
+
+    def reset(self):
+        self.accumulator.reset()
+
+    def weight(self, path):
+        # Weight of the values of a scan in the sum
+        return 1.0
+
+    def add_file(self, path):
+
+        # Read, decode and add one scan
+        img = gdal.Open(f'NETCDF:{path}:' + self.var)
+        dqf = gdal.Open(f'NETCDF:{path}:DQF')
+        if img is None or dqf is None:
+            print(f'Could not read {path}')
+            return
+
+        metadata = img.GetMetadata()
+        scale = float(metadata.get(self.var + '#scale_factor'))
+        offset = float(metadata.get(self.var + '#add_offset'))
+        undef = float(metadata.get(self.var + '#_FillValue'))
+
+        if self.window is None:
+            self.window, self.projection = abi_window(img, self.extent)
+        self.buffer = decode_abi(read_window(img, self.window), scale, offset, undef,
+                                 read_window(dqf, self.window), self.dqf_max, out=self.buffer)
+        self.accumulator.add(self.buffer, weight=self.weight(path))
+
+    def add_files(self, file_names, path_dest):
+        for file_name in file_names:
+            self.add_file(f'{path_dest}/{file_name}.nc')
+
+    def add_period(self, date_ini, date_end, path_dest, bucket_name):
+
+        # Download and add all the scans that start in [date_ini, date_end)
+        file_names = download_range(self.product_name, date_ini, date_end - timedelta(seconds=1), path_dest, bucket_name)
+        self.add_files(file_names, path_dest)
+        return len(file_names)
+
+    @property
+    def scans(self):
+        return self.accumulator.scans
+
+    @property
+    def total(self):
+        # Sum of the scans on the native grid (window), without a copy
+        return self.accumulator.total
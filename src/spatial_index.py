@@ -0,0 +1,94 @@
+# Spatial index for point data (fire foci, lightning flashes)
+#
+# The points are bucketed in a regular lat/lon grid and sorted by cell, once per data refresh.
+# A query only looks at the points of the cells around each position, and many positions are
+# answered together with array operations.
+
+# Required modules
+import numpy as np                                    # Scientific computing with Python
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Number of positions handled at once by query_many (limits the size of the temporary arrays)
+BATCH_SIZE = 10000
+
+class GridIndex:
+
+    def __init__(self, lats, lons, cell_size=0.5):
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+
+        # Points without position are left out
+        valid = np.isfinite(lats) & np.isfinite(lons)
+
+        self.cell_size = cell_size
+        self.ncols = int(np.ceil(360 / cell_size)) + 3
+        cells = self.cell(lats[valid], lons[valid])
+
+        # Points sorted by cell; index keeps the position of each point in the original arrays
+        order = np.argsort(cells, kind='stable')
+        self.cells = cells[order]
+        self.lats = lats[valid][order]
+        self.lons = lons[valid][order]
+        self.index = np.flatnonzero(valid)[order]
+
+    def __len__(self):
+        return self.cells.size
+
+    def cell(self, lats, lons):
+        rows = np.floor((lats + 90) / self.cell_size).astype(np.int64) + 1
+        cols = np.floor((lons + 180) / self.cell_size).astype(np.int64) + 1
+        return rows * self.ncols + cols
+
+    def candidates(self, lats, lons, radius):
+
+        # Pairs (query, point) for all the points in the cells that may be within the radius
+        n = int(np.ceil(radius / self.cell_size))
+        centers = self.cell(lats, lons)
+        queries, starts, counts = [], [], []
+        for drow in range(-n, n + 1):
+            for dcol in range(-n, n + 1):
+                keys = centers + drow * self.ncols + dcol
+                start = np.searchsorted(self.cells, keys, 'left')
+                end = np.searchsorted(self.cells, keys, 'right')
+                queries.append(np.arange(lats.size))
+                starts.append(start)
+                counts.append(end - start)
+        queries, starts, counts = np.concatenate(queries), np.concatenate(starts), np.concatenate(counts)
+
+        # Expand each range [start, start + count) into the individual point positions
+        total = counts.sum()
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        points = np.repeat(starts, counts) + (np.arange(total) - offsets)
+        return np.repeat(queries, counts), points
+
+    def count_many(self, lats, lons, radius=0.5):
+
+        # Number of points with |lat - point lat| <= radius and |lon - point lon| <= radius
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        result = np.zeros(lats.size, dtype=np.int64)
+        if len(self) == 0:
+            return result
+
+        for first in range(0, lats.size, BATCH_SIZE):
+            q_lats, q_lons = lats[first:first + BATCH_SIZE], lons[first:first + BATCH_SIZE]
+            queries, points = self.candidates(q_lats, q_lons, radius)
+            inside = (np.abs(self.lats[points] - q_lats[queries]) <= radius) & \
+                     (np.abs(self.lons[points] - q_lons[queries]) <= radius)
+            result[first:first + q_lats.size] = np.bincount(queries[inside], minlength=q_lats.size)
+        return result
+
+    def query_many(self, lats, lons, radius=0.5):
+        # For each position, is there any point within the radius?
+        return self.count_many(lats, lons, radius) > 0
+
+    def any_within(self, lat, lon, radius=0.5):
+        return bool(self.query_many(lat, lon, radius)[0])
+
+    def within(self, lat, lon, radius=0.5):
+
+        # Positions (in the original arrays) of the points within the radius of one position
+        queries, points = self.candidates(np.atleast_1d(float(lat)), np.atleast_1d(float(lon)), radius)
+        inside = (np.abs(self.lats[points] - lat) <= radius) & (np.abs(self.lons[points] - lon) <= radius)
+        return np.sort(self.index[points[inside]])
@@ -0,0 +1,194 @@
+# Summary of every product on a fixed lat/lon tile grid over Brazil (for the app's location lookups)
+#
+# After each new scan the pixels of the product are aggregated in tiles of RES degrees (min, mean
+# and max of the values) and point data (fire foci, lightning flashes) is counted per tile and in
+# the neighbourhood of each tile. The table is a .npz file loaded in memory, so the summary of a
+# user position is just the index of its tile (or the few tiles around it).
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import numpy as np                                    # Scientific computing with Python
+
+#-----------------------------------------------------------------------------------------------------------
+
+# Tile grid: extent = [min lon, min lat, max lon, max lat] and size of the tiles (degrees)
+EXTENT = [-75.0, -34.0, -34.0, 5.5]
+RES = 0.1
+
+# Where the table is kept
+SUMMARY_FILE = os.environ.get('GOES_SUMMARY_FILE', 'summary_tiles.npz')
+
+class SummaryTiles:
+
+    def __init__(self, extent=EXTENT, res=RES, fields=None):
+        self.extent = [float(value) for value in extent]
+        self.res = float(res)
+        self.ncol = int(round((self.extent[2] - self.extent[0]) / self.res))
+        self.nrow = int(round((self.extent[3] - self.extent[1]) / self.res))
+        # One (nrow, ncol) float32 array per field, e.g. 'CMI13_min', 'fire_count'
+        self.fields = {} if fields is None else fields
+
+    def cells(self, lats, lons):
+
+        # Flat index of the tile of each position (-1 outside the grid)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            rows = np.floor((self.extent[3] - lats) / self.res)
+            cols = np.floor((lons - self.extent[0]) / self.res)
+            inside = (rows >= 0) & (rows < self.nrow) & (cols >= 0) & (cols < self.ncol)
+        return np.where(inside, rows * self.ncol + cols, -1).astype(np.int64)
+
+    def add_product(self, name, values, lats, lons):
+
+        # min / mean / max of the valid values of each tile (NaN in the tiles without values)
+        values = np.asarray(values, dtype=np.float32).ravel()
+        cells = self.cells(np.ravel(lats), np.ravel(lons)).ravel()
+        valid = (cells >= 0) & np.isfinite(values)
+        values, cells = values[valid], cells[valid]
+
+        size = self.nrow * self.ncol
+        count = np.bincount(cells, minlength=size)
+        total = np.bincount(cells, weights=values, minlength=size)
+        minimum = np.full(size, np.nan, dtype=np.float32)
+        maximum = np.full(size, np.nan, dtype=np.float32)
+        mean = np.full(size, np.nan, dtype=np.float32)
+        if values.size:
+            # Values sorted by tile: min and max of each run of the same tile
+            order = np.argsort(cells, kind='stable')
+            cells, values = cells[order], values[order]
+            starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+            minimum[cells[starts]] = np.minimum.reduceat(values, starts)
+            maximum[cells[starts]] = np.maximum.reduceat(values, starts)
+            mean[count > 0] = total[count > 0] / count[count > 0]
+
+        shape = (self.nrow, self.ncol)
+        self.fields[f'{name}_min'] = minimum.reshape(shape)
+        self.fields[f'{name}_mean'] = mean.reshape(shape)
+        self.fields[f'{name}_max'] = maximum.reshape(shape)
+
+    def add_pixels(self, name, values, projection):
+
+        # Lowest and highest value of the pixels that projection.geo2grid can give for a position of
+        # each tile, and whether any of them has no value (NaN or outside the array). The pixel of a
+        # position is between the pixels of the corners of its tile in lines and in columns, so a
+        # position can be answered as if its own pixel were read (the NDVI pixels are bigger than the
+        # tiles, then there is usually just one).
+        values = np.asarray(values, dtype=np.float32)
+        nlin, ncol = values.shape
+        corner_lats = self.extent[3] - self.res * np.arange(self.nrow + 1)
+        corner_lons = self.extent[0] + self.res * np.arange(self.ncol + 1)
+        lins, cols = projection.geo2grid(*np.meshgrid(corner_lats, corner_lons, indexing='ij'))
+        corners = lambda array: np.stack([array[:-1, :-1], array[:-1, 1:], array[1:, :-1], array[1:, 1:]])
+        lins, cols = corners(lins), corners(cols)
+        lin0, lin1, col0, col1 = lins.min(0), lins.max(0), cols.min(0), cols.max(0)
+
+        shape = (self.nrow, self.ncol)
+        minimum = np.full(shape, np.nan, dtype=np.float32)
+        maximum = np.full(shape, np.nan, dtype=np.float32)
+        # Corners outside the disk: the pixels of the tile are unknown
+        missing = (lin0 < 0) | (col0 < 0)
+        for dlin in range(int((lin1 - lin0).max()) + 1):
+            for dcol in range(int((col1 - col0).max()) + 1):
+                lin, col = lin0 + dlin, col0 + dcol
+                active = (lin <= lin1) & (col <= col1)
+                inside = (lin >= 0) & (lin < nlin) & (col >= 0) & (col < ncol)
+                value = values[np.clip(lin, 0, nlin - 1), np.clip(col, 0, ncol - 1)]
+                valid = active & inside & np.isfinite(value)
+                missing |= active & ~valid
+                minimum = np.where(valid, np.fmin(minimum, value), minimum)
+                maximum = np.where(valid, np.fmax(maximum, value), maximum)
+
+        self.fields[f'{name}_pixel_min'] = minimum
+        self.fields[f'{name}_pixel_max'] = maximum
+        self.fields[f'{name}_pixel_missing'] = missing.astype(np.float32)
+
+    def pixel_range(self, name, lat, lon):
+
+        # (lowest value, highest value, any pixel without value) of the pixels of the tile of one
+        # position (see add_pixels), None outside the grid or if the table doesn't have the product
+        names = [f'{name}_pixel_min', f'{name}_pixel_max', f'{name}_pixel_missing']
+        cell = int(self.cells(lat, lon))
+        if cell < 0 or any(field not in self.fields for field in names):
+            return None
+        row, col = divmod(cell, self.ncol)
+        minimum, maximum, missing = (float(self.fields[field][row, col]) for field in names)
+        return minimum, maximum, missing > 0
+
+    def add_points(self, name, lats, lons, radius=0.5):
+
+        # Number of points in each tile and within about radius degrees of each tile
+        cells = self.cells(lats, lons).ravel()
+        count = np.bincount(cells[cells >= 0], minlength=self.nrow * self.ncol).reshape(self.nrow, self.ncol)
+
+        # Sum of the (2n + 1) x (2n + 1) tiles around each tile, with a summed area table
+        n = int(round(radius / self.res))
+        table = np.zeros((self.nrow + 1, self.ncol + 1), dtype=np.int64)
+        table[1:, 1:] = count.cumsum(0).cumsum(1)
+        rows, cols = np.arange(self.nrow), np.arange(self.ncol)
+        r0, r1 = np.clip(rows - n, 0, self.nrow), np.clip(rows + n + 1, 0, self.nrow)
+        c0, c1 = np.clip(cols - n, 0, self.ncol), np.clip(cols + n + 1, 0, self.ncol)
+        nearby = table[r1][:, c1] - table[r0][:, c1] - table[r1][:, c0] + table[r0][:, c0]
+
+        self.fields[f'{name}_count'] = count.astype(np.float32)
+        self.fields[f'{name}_nearby'] = nearby.astype(np.float32)
+
+    def window(self, lat, lon, radius, inside=False):
+
+        # Rows and columns (slices) of the tiles that touch the box |lat - lat'| <= radius,
+        # |lon - lon'| <= radius, or (inside=True) that are entirely in it. None if the box is not
+        # entirely on the grid. A small margin makes the tiles on the edge of the box count as
+        # touching and not as inside, whatever the rounding
+        eps = -1e-6 if inside else 1e-6
+        y, x, n = (self.extent[3] - lat) / self.res, (lon - self.extent[0]) / self.res, radius / self.res
+        r0, r1, c0, c1 = np.floor(y - n - eps), np.floor(y + n + eps), np.floor(x - n - eps), np.floor(x + n + eps)
+        if not (0 <= r0 and r1 < self.nrow and 0 <= c0 and c1 < self.ncol):
+            return None
+        if inside:
+            r0, r1, c0, c1 = np.ceil(y - n + 1e-6), r1 - 1, np.ceil(x - n + 1e-6), c1 - 1
+        return slice(int(r0), int(r1) + 1), slice(int(c0), int(c1) + 1)
+
+    def count_within(self, name, lat, lon, radius):
+
+        # Points of the field {name}_count in the box of the radius around one position:
+        # (points surely in the box, points that may be in the box), None if it can't be known
+        field = self.fields.get(f'{name}_count')
+        touching = self.window(lat, lon, radius)
+        if field is None or touching is None:
+            return None
+        inside = self.window(lat, lon, radius, inside=True)
+        return float(field[inside].sum()), float(field[touching].sum())
+
+    def lookup(self, lat, lon):
+
+        # Every field at the tile of one position (NaN's outside the grid)
+        cell = int(self.cells(lat, lon))
+        if cell < 0:
+            return {name: np.nan for name in self.fields}
+        row, col = divmod(cell, self.ncol)
+        return {name: float(array[row, col]) for name, array in self.fields.items()}
+
+    def lookup_many(self, lats, lons):
+
+        # Every field at the tiles of many positions
+        cells = self.cells(np.atleast_1d(lats), np.atleast_1d(lons))
+        inside = cells >= 0
+        result = {}
+        for name, array in self.fields.items():
+            values = np.full(cells.shape, np.nan, dtype=np.float32)
+            values[inside] = array.ravel()[cells[inside]]
+            result[name] = values
+        return result
+
+    def save(self, file_name=SUMMARY_FILE):
+
+        # Written to a temporary file first, so the readers never see a partial table
+        tmp_file = f'{file_name}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_file, extent=np.array(self.extent), res=np.array(self.res), **self.fields)
+        os.replace(tmp_file, file_name)
+
+    @classmethod
+    def load(cls, file_name=SUMMARY_FILE):
+        with np.load(file_name) as data:
+            fields = {name: data[name] for name in data.files if name not in ('extent', 'res')}
+            return cls(data['extent'], data['res'], fields)
@@ -0,0 +1,64 @@
+# Running accumulation of scans against the original zeros + nansum(dstack) accumulation
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+import pytest
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from accumulator import RasterAccumulator             # Accumulation of the scans of a period
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+def scans(n, shape=(40, 60)):
+    # Scans with NaN's (undef, outside the disk), a pixel that is never valid
+    result = []
+    for _ in range(n):
+        scan = rng.uniform(0, 20, shape).astype(np.float32)
+        scan[rng.random(shape) < 0.2] = np.nan
+        scan[0, 0] = np.nan
+        result.append(scan)
+    return result
+
+def test_statistics_match_the_stacked_scans():
+    stack = scans(6)
+    accumulator = RasterAccumulator()
+    for scan in stack:
+        accumulator.add(scan)
+    assert accumulator.scans == 6
+
+    # The accumulation of the original scripts
+    array = np.zeros(stack[0].shape)
+    for scan in stack:
+        array = np.nansum(np.dstack((array, scan)), 2)
+    np.testing.assert_allclose(accumulator.total, array, rtol=1e-5)
+
+    cube = np.stack(stack)
+    valid = np.isfinite(cube)
+    np.testing.assert_array_equal(accumulator.count, valid.sum(axis=0))
+    np.testing.assert_allclose(accumulator.mean()[1:], np.nanmean(cube[:, 1:], axis=0), rtol=1e-5)
+    np.testing.assert_array_equal(accumulator.max[1:], np.nanmax(cube[:, 1:], axis=0))
+    last = np.take_along_axis(cube, (len(stack) - 1 - np.argmax(valid[::-1], axis=0))[np.newaxis], axis=0)[0]
+    np.testing.assert_array_equal(accumulator.last[1:], last[1:])
+
+    # Pixel without any valid value
+    assert accumulator.total[0, 0] == 0 and accumulator.count[0, 0] == 0
+    assert np.isnan(accumulator.mean()[0, 0]) and np.isnan(accumulator.max[0, 0]) and np.isnan(accumulator.last[0, 0])
+
+def test_weighted_total_and_reset():
+    # Rates (mm/h) of 10-minute scans give the total of the hour (mm)
+    stack = scans(6)
+    accumulator = RasterAccumulator(stack[0].shape)
+    for scan in stack:
+        accumulator.add(scan, weight=10 / 60)
+    np.testing.assert_allclose(accumulator.total, np.nansum(np.stack(stack), axis=0) / 6, rtol=1e-5)
+
+    accumulator.reset()
+    assert accumulator.scans == 0
+    accumulator.add(stack[0])
+    np.testing.assert_allclose(accumulator.total, np.nan_to_num(stack[0]))
+
+    with pytest.raises(ValueError):
+        accumulator.add(np.zeros((2, 2), dtype=np.float32))
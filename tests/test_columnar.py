@@ -0,0 +1,53 @@
+# Columnar datasets partitioned by day and hour against the rows that were written
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+from datetime import datetime                         # Basic Dates and time types
+import numpy as np                                    # Scientific computing with Python
+import pandas as pd                                   # Data analysis and manipulation
+import pytest
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from columnar import write_partitioned, read_partitioned, time_filter, check_format # Parquet / Arrow IPC
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+def points(n, start='2021-12-16 22:00'):
+    # Points of three hours over two days, in the order they were read
+    times = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, 3 * 3600, n)), unit='s')
+    return pd.DataFrame({'lat': rng.uniform(-34, 5.5, n), 'lon': rng.uniform(-75, -34, n), 'time': times})
+
+@pytest.mark.parametrize('format', ['parquet', 'feather'])
+def test_chunks_are_read_back_typed_and_in_order(tmp_path, format):
+    root = str(tmp_path / 'flashs')
+    df = points(3000)
+    for chunk in np.array_split(np.arange(len(df)), 4):
+        write_partitioned(df.iloc[chunk], root, 'time', format)
+
+    assert sorted(os.listdir(root)) == ['day=2021-12-16', 'day=2021-12-17']
+    assert sorted(os.listdir(os.path.join(root, 'day=2021-12-16'))) == ['hour=22', 'hour=23']
+
+    result = read_partitioned(root, format, columns=['lat', 'lon', 'time'])
+    assert result['lat'].dtype == np.float32 and result['lon'].dtype == np.float32
+    assert np.issubdtype(result['time'].dtype, np.datetime64)
+    np.testing.assert_array_equal(result['lat'], df['lat'].astype(np.float32))
+    np.testing.assert_array_equal(result['lon'], df['lon'].astype(np.float32))
+    assert (result['time'] == df['time']).all()
+
+def test_time_filter_reads_only_the_window(tmp_path):
+    root = str(tmp_path / 'flashs')
+    df = points(2000)
+    write_partitioned(df, root)
+
+    date_ini, date_end = datetime(2021, 12, 16, 23, 30), datetime(2021, 12, 17, 0, 15)
+    result = read_partitioned(root, columns=['time', 'lat'], filter=time_filter(date_ini, date_end))
+    expected = df[(df['time'] >= date_ini) & (df['time'] <= date_end)]
+    assert list(result.columns) == ['time', 'lat']
+    assert len(result) == len(expected) > 0
+    np.testing.assert_array_equal(np.sort(result['lat']), np.sort(expected['lat'].astype(np.float32)))
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        check_format('csv')
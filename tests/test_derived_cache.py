@@ -0,0 +1,64 @@
+# Cache of derived products: keys, entries computed once and eviction of the least recently used
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from derived_cache import DerivedCache                # Cache of derived products
+
+#-----------------------------------------------------------------------------------------------------------
+
+def test_key_depends_on_every_parameter():
+    cache = DerivedCache('unused')
+    key = cache.key(['a.nc', 'b.nc'], extent=[-75, -34, -34, 5.5], var='RRQPE')
+    assert key == cache.key(['a.nc', 'b.nc'], var='RRQPE', extent=[-75, -34, -34, 5.5])
+    assert key != cache.key(['a.nc', 'b.nc'], extent=[-75, -34, -34, 5.5], var='CMI')
+    assert key != cache.key(['a.nc'], extent=[-75, -34, -34, 5.5], var='RRQPE')
+    assert cache.key(key, cmap='binary') != cache.key(key, cmap='jet')
+
+def test_file_and_arrays_are_computed_once(tmp_path):
+    cache = DerivedCache(str(tmp_path))
+    calls = []
+
+    def write(tmp_file):
+        calls.append(tmp_file)
+        with open(tmp_file, 'w') as f:
+            f.write('png')
+
+    key = cache.key('scan', cmap='binary')
+    path = cache.file(key, '.png', write)
+    assert cache.file(key, '.png', write) == path
+    assert len(calls) == 1
+    with open(path) as f:
+        assert f.read() == 'png'
+
+    data = np.arange(12, dtype=np.float32).reshape(3, 4)
+    key = cache.key('scan', var='CMI')
+    first = cache.arrays(key, lambda: {'data': data})
+    second = cache.arrays(key, lambda: calls.append('again'))
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first['data'], second['data'])
+
+    # A None result (no valid scan) isn't stored
+    assert cache.arrays(cache.key('empty'), lambda: None) is None
+    assert cache.lookup(cache.key('empty'), '.npz') is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DerivedCache(str(tmp_path), max_bytes=250)
+
+    def write(tmp_file):
+        with open(tmp_file, 'wb') as f:
+            f.write(b'x' * 100)
+
+    keys = [cache.key(i) for i in range(3)]
+    for age, key in enumerate(keys[:2]):
+        path = cache.store(key, '.bin', write)
+        os.utime(path, (age, age))
+    os.utime(cache.lookup(keys[0], '.bin'))   # the first entry is used again
+
+    cache.store(keys[2], '.bin', write)
+    assert cache.lookup(keys[0], '.bin') is not None
+    assert cache.lookup(keys[1], '.bin') is None
+    assert cache.lookup(keys[2], '.bin') is not None
+    assert cache.size <= 250
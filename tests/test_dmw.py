@@ -0,0 +1,77 @@
+# Textures of the DMW vectors against per-pixel brute force references
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from dmw import WindGrid, rasterize, texture_latlon   # DMW vectors of a region
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+SHAPE = (20, 30)
+EXTENT = [-75.0, -34, -34, 5.5]
+
+def vectors(n):
+    lats = rng.uniform(EXTENT[1], EXTENT[3], n)
+    lons = rng.uniform(EXTENT[0], EXTENT[2], n)
+    return lats, lons, rng.normal(0, 10, n), rng.normal(0, 10, n)
+
+def test_rasterize_is_the_mean_of_the_vectors_of_each_pixel():
+    lats, lons, u, v = vectors(300)
+    # Vectors on the edges of the extent (last line and column of the texture)
+    lats[:20], lons[20:40] = EXTENT[1], EXTENT[2]
+    lats[40:60] = rng.uniform(EXTENT[1], EXTENT[1] + 0.5, 20)
+    for radius in (0, 2):
+        (u_tex, v_tex), count = rasterize([u, v], lats, lons, SHAPE, EXTENT, radius)
+
+        # One vector at a time, as in the original texture loop, with the disk around the pixel
+        sums = np.zeros((2,) + SHAPE)
+        expected = np.zeros(SHAPE)
+        nrow, ncol = SHAPE
+        for lat, lon, x, y in zip(lats, lons, u, v):
+            row = min(nrow - int((lat - EXTENT[1]) * nrow / (EXTENT[3] - EXTENT[1])), nrow - 1)
+            col = min(int((lon - EXTENT[0]) * ncol / (EXTENT[2] - EXTENT[0])), ncol - 1)
+            for r in range(nrow):
+                for c in range(ncol):
+                    if (r - row) ** 2 + (c - col) ** 2 <= radius ** 2:
+                        sums[:, r, c] += x, y
+                        expected[r, c] += 1
+        assert count.sum() >= len(lats)
+        np.testing.assert_array_equal(count, expected)
+        means = np.where(expected > 0, sums / np.maximum(expected, 1), 0)
+        np.testing.assert_allclose(u_tex, means[0], atol=1e-4)
+        np.testing.assert_allclose(v_tex, means[1], atol=1e-4)
+
+def test_wind_grid_is_the_idw_of_the_nearest_vectors():
+    lats, lons, u, v = vectors(60)
+    k, power = 8, 2
+    u_grid, v_grid = WindGrid(lats, lons, SHAPE, EXTENT, k=k, power=power).interpolate([u, v])
+
+    scale = np.cos(np.deg2rad((EXTENT[1] + EXTENT[3]) / 2))
+    pixel_lats, pixel_lons = texture_latlon(SHAPE, EXTENT)
+    for row in range(SHAPE[0]):
+        for col in range(SHAPE[1]):
+            distance = np.hypot((lons - pixel_lons[row, col]) * scale, lats - pixel_lats[row, col])
+            nearest = np.argsort(distance)[:k]
+            weights = 1 / distance[nearest] ** power
+            weights /= weights.sum()
+            assert np.isclose(u_grid[row, col], (u[nearest] * weights).sum(), atol=1e-4)
+            assert np.isclose(v_grid[row, col], (v[nearest] * weights).sum(), atol=1e-4)
+
+def test_wind_grid_leaves_pixels_without_near_vectors_empty():
+    lats, lons, u, v = vectors(40)
+    grid = WindGrid(lats, lons, SHAPE, EXTENT, k=4, max_distance=2.0)
+    (u_grid,) = grid.interpolate([u])
+
+    scale = np.cos(np.deg2rad((EXTENT[1] + EXTENT[3]) / 2))
+    pixel_lats, pixel_lons = texture_latlon(SHAPE, EXTENT)
+    for row in range(SHAPE[0]):
+        for col in range(SHAPE[1]):
+            distance = np.hypot((lons - pixel_lons[row, col]) * scale, lats - pixel_lats[row, col])
+            near = np.sort(distance)[:4] <= 2.0
+            assert grid.covered[row, col] == near.any()
+            if not near.any():
+                assert u_grid[row, col] == 0
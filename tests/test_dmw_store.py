@@ -0,0 +1,127 @@
+# DMW store: deduplication of the vectors of different channels and ingestion of the files of a window
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+from datetime import datetime                         # Basic Dates and time types
+import numpy as np                                    # Scientific computing with Python
+import pandas as pd                                   # Data analysis and manipulation
+from netCDF4 import Dataset                           # Read / Write NetCDF4 files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from dmw_store import (deduplicate, ingest_dmw, read_dmw, frames, DMW_CHANNELS,
+                       DEDUP_RES, DEDUP_HPA)          # Time-indexed store of the DMW vectors
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+def vectors(rows):
+    # DataFrame of (time, channel, lat, lon, pressure) rows
+    df = pd.DataFrame(rows, columns=['time', 'channel', 'lat', 'lon', 'pressure'])
+    df['time'] = pd.to_datetime(df['time'])
+    df['channel'] = df['channel'].astype(np.int8)
+    return df
+
+def distance(lat1, lon1, lat2, lon2):
+    # Great circle distance (degrees)
+    lat1, lon1, lat2, lon2 = np.deg2rad([lat1, lon1, lat2, lon2])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return np.rad2deg(2 * np.arcsin(np.sqrt(a)))
+
+def greedy(df):
+
+    # Vectors visited in order of preference of the channel, each one kept unless a vector of
+    # another channel of the same slot already kept is close to it
+    times, channels = df['time'].to_numpy(), df['channel'].to_numpy()
+    lats, lons, pressure = df['lat'].to_numpy(), df['lon'].to_numpy(), df['pressure'].to_numpy()
+    order = sorted(range(len(df)), key=lambda i: (times[i], DMW_CHANNELS.index(channels[i]), i))
+    kept = []
+    for i in order:
+        if not any(times[j] == times[i] and channels[j] != channels[i] and
+                   (distance(lats[i], lons[i], lats[j], lons[j]) / DEDUP_RES) ** 2 +
+                   ((pressure[i] - pressure[j]) / DEDUP_HPA) ** 2 <= 1 for j in kept):
+            kept.append(i)
+    return sorted(kept)
+
+def test_chain_of_close_vectors():
+    # 02 - 07 - 14 in a line, each one close to the next but 02 and 14 far apart: 07 is the same
+    # vector as 02 and is dropped, 14 is only close to the dropped 07 and is kept
+    step = 0.8 * DEDUP_RES
+    df = vectors([('2022-01-02 10:00', 2, -10, -50, 500),
+                  ('2022-01-02 10:00', 7, -10, -50 + step / np.cos(np.deg2rad(10)), 500),
+                  ('2022-01-02 10:00', 14, -10, -50 + 2 * step / np.cos(np.deg2rad(10)), 500),
+                  # Same channel: both kept
+                  ('2022-01-02 10:00', 14, -20, -60, 300),
+                  ('2022-01-02 10:00', 14, -20, -60, 300),
+                  # Same place, pressure too different: both kept
+                  ('2022-01-02 10:00', 8, -25, -55, 300),
+                  ('2022-01-02 10:00', 9, -25, -55, 300 + 2 * DEDUP_HPA),
+                  # Same place in another slot: kept
+                  ('2022-01-02 10:10', 7, -10, -50, 500)])
+    result = deduplicate(df)
+    assert len(result) == len(df) - 1
+    assert not ((result['channel'] == 7) & (result['time'] == pd.Timestamp('2022-01-02 10:00'))).any()
+
+def test_deduplicate_matches_the_greedy_reference():
+    n = 400
+    base = pd.DataFrame({'lat': rng.uniform(-12, -10, n), 'lon': rng.uniform(-52, -50, n),
+                         'pressure': rng.uniform(200, 900, n)})
+    # Copies of the vectors seen by other channels, moved by about the threshold
+    copies = base.sample(300, random_state=1, replace=True).reset_index(drop=True)
+    copies['lat'] += rng.normal(0, DEDUP_RES / 2, len(copies))
+    copies['lon'] += rng.normal(0, DEDUP_RES / 2, len(copies))
+    copies['pressure'] += rng.normal(0, DEDUP_HPA / 2, len(copies))
+    df = pd.concat([base, copies], ignore_index=True)
+    df['channel'] = rng.choice(DMW_CHANNELS, len(df)).astype(np.int8)
+    df['time'] = pd.to_datetime(rng.choice(['2022-01-02 10:00', '2022-01-02 10:10'], len(df)))
+    df['id'] = np.arange(len(df))
+
+    result = deduplicate(df)
+    assert sorted(result['id']) == sorted(df['id'].iloc[greedy(df)])
+    assert len(result) < len(df)
+
+def write_dmw(path, lats, lons, pressure, speed, direction):
+    with Dataset(path, 'w') as nc:
+        nc.createDimension('nMeasures', len(lats))
+        for name, values in (('lat', lats), ('lon', lons), ('pressure', pressure), ('temperature', np.full(len(lats), 250.0)),
+                             ('wind_direction', direction), ('wind_speed', speed)):
+            nc.createVariable(name, 'f4', ('nMeasures',), fill_value=np.float32(-999.0))[:] = values
+
+def test_ingest_and_read_the_vectors_of_a_window(tmp_path):
+    path = str(tmp_path / 'Samples')
+    os.makedirs(path)
+    n = 50
+    lats, lons = rng.uniform(-30, 0, n), rng.uniform(-70, -40, n)
+    pressure, speed, direction = rng.uniform(200, 900, n), rng.uniform(1, 30, n), rng.uniform(0, 360, n)
+    speed[0] = -999.0   # missing speed: not stored
+    names = []
+    for minute in (0, 10):
+        for channel in (2, 14):
+            name = f'OR_ABI-L2-DMWF-M6C{channel:02d}_G16_s202200210{minute:02d}205_e202200210{minute:02d}513_c202200210{minute:02d}592'
+            # Channel 14 sees the same vectors as channel 02, plus vectors of its own
+            own = slice(0, n) if channel == 2 else slice(0, n + 10)
+            extra = rng.uniform(0, 1, 10)
+            write_dmw(f'{path}/{name}.nc', np.r_[lats, -30 + 30 * extra][own], np.r_[lons, -70 + 30 * extra][own],
+                      np.r_[pressure, np.full(10, 150.0)][own], np.r_[speed, np.full(10, 5.0)][own],
+                      np.r_[direction, np.full(10, 90.0)][own])
+            names.append(name)
+
+    root = str(tmp_path / 'Store_DMW')
+    ingest_dmw(names, path, root)
+    ingest_dmw(names, path, root)   # files already ingested are skipped
+    df = read_dmw(root=root)
+
+    # Per slot: the vectors of channel 02 (but the one without speed) and the 10 of channel 14 only
+    times, starts, ends = frames(df)
+    assert list(pd.to_datetime(times)) == [datetime(2022, 1, 2, 10, 0), datetime(2022, 1, 2, 10, 10)]
+    for start, end in zip(starts, ends):
+        frame = df.iloc[start:end]
+        assert (frame['channel'] == 2).sum() == n - 1 and (frame['channel'] == 14).sum() == 10
+    # u / v of the speed of each vector (5 m/s for the vectors of channel 14 only)
+    speeds = dict(zip(lats.astype(np.float32), speed))
+    expected = [speeds.get(lat, 5.0) for lat in df['lat']]
+    np.testing.assert_allclose(np.hypot(df['u'], df['v']), expected, rtol=1e-5)
+
+    # A window and a subset of the columns
+    window = read_dmw(datetime(2022, 1, 2, 10, 5), datetime(2022, 1, 2, 10, 15), root, columns=['lat', 'u'])
+    assert list(window.columns) == ['lat', 'u'] and len(window) == n - 1 + 10
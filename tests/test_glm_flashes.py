@@ -0,0 +1,77 @@
+# Streaming accumulation of GLM flashes against the concatenation of the flashes of every file
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+import pandas as pd                                   # Data analysis and manipulation
+import pytest
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from glm_flashes import FlashAccumulator              # Streaming accumulation of GLM flashes
+from columnar import read_partitioned                 # Parquet / Arrow IPC input
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+def glm_files(n):
+    # (lats, lons, time) of n 20-second files, with empty files, masked values and a large file
+    files = []
+    for i in range(n):
+        size = 0 if i % 7 == 3 else (250 if i == 5 else int(rng.integers(1, 40)))
+        lats = np.ma.masked_array(rng.uniform(-34, 5.5, size), mask=rng.random(size) < 0.05)
+        lons = rng.uniform(-75, -34, size)
+        files.append((lats, lons, pd.Timestamp('2021-12-16 23:58:00') + pd.Timedelta(seconds=20 * i)))
+    return files
+
+def reference(files):
+    # One DataFrame per file, concatenated (what the DataFrame.append loop built)
+    frames = [pd.DataFrame({'lat': np.ma.filled(lats.astype(np.float32), np.nan), 'lon': lons.astype(np.float32),
+                            'time': time}) for lats, lons, time in files]
+    return pd.concat(frames, ignore_index=True)
+
+@pytest.mark.parametrize('chunk_size', [16, 100, 10000])
+def test_csv_has_every_flash_in_order(tmp_path, chunk_size):
+    files = glm_files(30)
+    file_name = str(tmp_path / 'flashs.csv')
+    flashes = FlashAccumulator(file_name, chunk_size)
+    for lats, lons, time in files:
+        flashes.append(lats, lons, time)
+    expected = reference(files)
+    assert flashes.close() == len(expected)
+
+    df = pd.read_csv(file_name, index_col=0, parse_dates=['time'])
+    assert list(df.index) == list(range(len(expected)))
+    np.testing.assert_allclose(df['lat'], expected['lat'], rtol=1e-6)
+    np.testing.assert_allclose(df['lon'], expected['lon'], rtol=1e-6)
+    assert (df['time'] == expected['time']).all()
+
+def test_parquet_dataset_and_new_output(tmp_path):
+    files = glm_files(30)
+    root = str(tmp_path / 'flashs')
+    for _ in range(2):   # the second export replaces the first one
+        flashes = FlashAccumulator(root, 50, format='parquet')
+        for lats, lons, time in files:
+            flashes.append(lats, lons, time)
+        flashes.close()
+
+    expected = reference(files)
+    df = read_partitioned(root, columns=['lat', 'lon', 'time'])
+    assert len(df) == len(expected)
+    np.testing.assert_array_equal(df['lat'], expected['lat'])
+    assert (df['time'] == expected['time']).all()
+
+def test_empty_export_and_foreign_directory(tmp_path):
+    file_name = str(tmp_path / 'flashs.csv')
+    assert FlashAccumulator(file_name).close() == 0
+    assert list(pd.read_csv(file_name, index_col=0).columns) == ['lat', 'lon', 'time']
+
+    # A directory with other files is only replaced with overwrite=True
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / 'data.txt').write_text('keep')
+    with pytest.raises(FileExistsError):
+        FlashAccumulator(str(other), format='parquet')
+    assert (other / 'data.txt').exists()
+    FlashAccumulator(str(other), format='parquet', overwrite=True).close()
+    assert not (other / 'data.txt').exists()
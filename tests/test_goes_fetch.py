@@ -0,0 +1,71 @@
+# Download layer against a local bucket (LocalBucketClient), without network access
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+from datetime import datetime, timezone               # Basic Dates and time types
+import pytest
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import goes_fetch                                     # Shared GOES-16 download layer
+
+#-----------------------------------------------------------------------------------------------------------
+
+BUCKET = 'noaa-goes16'
+
+def put(root, product_name, start, channel=None):
+
+    # Empty file of one scan in the local bucket, e.g. ABI-L2-CMIPF/2022/002/10/OR_ABI-L2-CMIPF-M6C13_G16_s2022002100020_...
+    mode = 'M6' if channel is None else f'M6C{channel:02d}'
+    folder = os.path.join(root, BUCKET, product_name, start.strftime('%Y'), start.strftime('%j'), start.strftime('%H'))
+    name = f'OR_{product_name}-{mode}_G16_s{start.strftime("%Y%j%H%M%S")}0_e{start.strftime("%Y%j%H%M%S")}0_c{start.strftime("%Y%j%H%M%S")}0.nc'
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, name), 'w') as f:
+        f.write(name)
+    return name[:-3]
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+    # Local bucket as the shared client, and a listing cache of its own
+    monkeypatch.setattr(goes_fetch, '_index', goes_fetch.ListingIndex(str(tmp_path / 'cache')))
+    goes_fetch.set_s3_client(goes_fetch.LocalBucketClient(str(tmp_path / 'bucket')))
+    yield str(tmp_path / 'bucket')
+    goes_fetch.set_s3_client(None)
+
+def test_download_cmi(bucket, tmp_path):
+    name = put(bucket, 'ABI-L2-CMIPF', datetime(2022, 1, 2, 10, 0, 20), channel=13)
+    put(bucket, 'ABI-L2-CMIPF', datetime(2022, 1, 2, 10, 0, 20), channel=14)
+
+    dest = str(tmp_path / 'Samples')
+    assert goes_fetch.download_CMI('202201021000', 13, dest, BUCKET) == name
+    assert os.listdir(dest) == [f'{name}.nc']
+    assert goes_fetch.download_CMI('202201021010', 13, dest, BUCKET) == -1
+
+def test_download_range(bucket, tmp_path):
+    names = [put(bucket, 'ABI-L2-DMWF', datetime(2022, 1, 2, hour, minute), channel)
+             for hour in (9, 10, 11) for minute in (0, 30) for channel in (2, 14)]
+
+    dest = str(tmp_path / 'Samples')
+    files = goes_fetch.download_range('ABI-L2-DMWF', datetime(2022, 1, 2, 9, 30), datetime(2022, 1, 2, 11, 0), dest, BUCKET,
+                                      key_filter=lambda key: '-M6C14_' in key)
+    expected = [name for name in names if '-M6C14_' in name and datetime(2022, 1, 2, 9, 30) <= goes_fetch.file_start_time(name) <= datetime(2022, 1, 2, 11, 0)]
+    assert files == expected
+    assert sorted(os.listdir(dest)) == sorted(f'{name}.nc' for name in expected)
+
+def test_listing_of_incomplete_hour_is_listed_again(bucket, tmp_path, monkeypatch):
+    # A listing fetched while the hour is being published must not be kept as a complete hour
+    hour_prefix = 'ABI-L2-RRQPEF/2022/002/10/'
+    put(bucket, 'ABI-L2-RRQPEF', datetime(2022, 1, 2, 10, 0, 20))
+    during = datetime(2022, 1, 2, 10, 5, tzinfo=timezone.utc).timestamp()
+
+    monkeypatch.setattr(goes_fetch.time, 'time', lambda: during)
+    assert len(goes_fetch.ListingIndex(str(tmp_path / 'cache')).keys(BUCKET, hour_prefix)) == 1
+
+    for minute in (10, 20, 30, 40, 50):
+        put(bucket, 'ABI-L2-RRQPEF', datetime(2022, 1, 2, 10, minute, 20))
+    monkeypatch.setattr(goes_fetch.time, 'time', lambda: during + 3 * 3600)
+    assert len(goes_fetch.ListingIndex(str(tmp_path / 'cache')).keys(BUCKET, hour_prefix)) == 6
+
+    # Fetched after the hour was complete: kept from the cache
+    put(bucket, 'ABI-L2-RRQPEF', datetime(2022, 1, 2, 10, 55, 20))
+    monkeypatch.setattr(goes_fetch.time, 'time', lambda: during + 4 * 3600)
+    assert len(goes_fetch.ListingIndex(str(tmp_path / 'cache')).keys(BUCKET, hour_prefix)) == 6
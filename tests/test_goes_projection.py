@@ -0,0 +1,104 @@
+# GOES fixed grid conversions against the original scalar formulas, and the window of an extent
+
+# Required modules
+import math                                           # Mathematical functions
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+import pytest
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from goes_projection import GoesProjection, ndvi_projection, goes16_projection # GOES fixed grid geometry
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+def scalar_latlon2xy(lat, lon):
+
+    # latlon2xy of extra/criterio_escolha.py, one point at a time with math
+    req = 6378137
+    rpol = 6356752.31414
+    e = 0.0818191910435
+    H = 42164160
+    lambda0 = -1.308996939
+    latRad = lat * (math.pi/180)
+    lonRad = lon * (math.pi/180)
+    Phi_c = math.atan(((rpol * rpol)/(req * req)) * math.tan(latRad))
+    rc = rpol/(math.sqrt(1 - ((e * e) * (math.cos(Phi_c) * math.cos(Phi_c)))))
+    sx = H - (rc * math.cos(Phi_c) * math.cos(lonRad - lambda0))
+    sy = -rc * math.cos(Phi_c) * math.sin(lonRad - lambda0)
+    sz = rc * math.sin(Phi_c)
+    x = math.asin((-sy)/math.sqrt((sx*sx) + (sy*sy) + (sz*sz)))
+    y = math.atan(sz/sx)
+    return x, y
+
+def scalar_geo2grid(lat, lon, xscale, xoffset, yscale, yoffset):
+    x, y = scalar_latlon2xy(lat, lon)
+    col = (x - xoffset)/xscale
+    lin = (y - yoffset)/yscale
+    return int(lin), int(col)
+
+def positions(n):
+    return rng.uniform(-34, 5.5, n), rng.uniform(-75, -34, n)
+
+def test_latlon2xy_matches_the_scalar_formula():
+    lats, lons = positions(2000)
+    x, y = goes16_projection.latlon2xy(lats, lons)
+    expected = np.array([scalar_latlon2xy(lat, lon) for lat, lon in zip(lats, lons)])
+    np.testing.assert_allclose(x, expected[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(y, expected[:, 1], rtol=0, atol=1e-9)
+
+    # Numbers in, numbers out
+    x, y = goes16_projection.latlon2xy(-10.0, -50.0)
+    assert np.ndim(x) == 0 and np.isclose(x, scalar_latlon2xy(-10.0, -50.0)[0])
+
+def test_geo2grid_matches_the_scalar_formula():
+    lats, lons = positions(5000)
+    for grid in (ndvi_projection, goes16_projection):
+        lins, cols = grid.geo2grid(lats, lons)
+        expected = [scalar_geo2grid(lat, lon, grid.xscale, grid.xoffset, grid.yscale, grid.yoffset)
+                    for lat, lon in zip(lats, lons)]
+        assert list(zip(lins.tolist(), cols.tolist())) == expected
+        assert grid.geo2grid(lats[0], lons[0]) == expected[0]
+
+def test_positions_not_seen_are_outside_the_grid():
+    lins, cols = goes16_projection.geo2grid(np.array([-10.0, 10.0]), np.array([-50.0, 120.0]))
+    assert lins[1] == -1 and cols[1] == -1
+    assert lins[0] >= 0 and cols[0] >= 0
+
+def test_grid2latlon_is_the_inverse_of_latlon2xy():
+    grid = goes16_projection.subset(*goes16_projection.window([-60, -20, -50, -10]))
+    lats, lons = grid.grid2latlon()
+    x, y = grid.latlon2xy(lats.astype(np.float64), lons.astype(np.float64))
+    nlin, ncol = grid.shape
+    # float32 tables: a small fraction of a pixel
+    x_grid, y_grid = np.meshgrid(grid.xoffset + grid.xscale * np.arange(ncol), grid.yoffset + grid.yscale * np.arange(nlin))
+    assert np.abs(x - x_grid).max() < 0.01 * abs(grid.xscale)
+    assert np.abs(y - y_grid).max() < 0.01 * abs(grid.yscale)
+
+def test_window_covers_the_extent():
+    extent = [-75.0, -34, -34, 5.5]
+    lin0, lin1, col0, col1 = goes16_projection.window(extent)
+    block = goes16_projection.subset(lin0, lin1, col0, col1)
+    assert block.shape == (lin1 - lin0, col1 - col0)
+    assert (lin1 - lin0) * (col1 - col0) < 0.2 * 5424 * 5424
+
+    # Nearest pixel (as the warp map) of positions of the extent and of its edges, in the full grid
+    lats, lons = positions(20000)
+    edges = np.linspace(0, 1, 500)
+    lats = np.r_[lats, extent[1] + 0 * edges, extent[3] + 0 * edges, extent[1] + edges * (extent[3] - extent[1])]
+    lons = np.r_[lons, extent[0] + edges * (extent[2] - extent[0]), extent[2] + 0 * edges, extent[2] + 0 * edges]
+    x, y = goes16_projection.latlon2xy(lats, lons)
+    lins = np.rint((y - goes16_projection.yoffset) / goes16_projection.yscale)
+    cols = np.rint((x - goes16_projection.xoffset) / goes16_projection.xscale)
+    assert ((lins >= lin0) & (lins < lin1) & (cols >= col0) & (cols < col1)).all()
+
+    # The block has the same pixels as the full grid
+    full_lins, full_cols = goes16_projection.geo2grid(lats, lons)
+    block_lins, block_cols = block.geo2grid(lats, lons)
+    np.testing.assert_array_equal(block_lins, full_lins - lin0)
+    np.testing.assert_array_equal(block_cols, full_cols - col0)
+
+def test_window_of_an_extent_not_seen():
+    with pytest.raises(ValueError):
+        goes16_projection.window([100, -10, 120, 10])
@@ -0,0 +1,44 @@
+# Suavizacao das texturas de vento contra a media ponderada calculada pixel a pixel
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from interpolacao import suaviza                      # Suavizacao das texturas
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+def suaviza_pixel(image):
+
+    # Media dos vizinhos de cada pixel como no laco original (pesos 7, 6, 5 nas 8 direcoes), com
+    # os limites da imagem em vez de 403 x 389, sobre a imagem original
+    nlin, ncol = image.shape[:2]
+    resultado = np.array(image, dtype=np.float64)
+    for lin in range(nlin):
+        for col in range(ncol):
+            soma = 0
+            total = 0
+            for k, peso in ((1, 7), (2, 6), (3, 5)):
+                for dlin, dcol in ((1, 1), (-1, -1), (1, -1), (-1, 1), (0, 1), (0, -1), (-1, 0), (1, 0)):
+                    if 0 <= lin + k * dlin < nlin and 0 <= col + k * dcol < ncol:
+                        soma = soma + image[lin + k * dlin, col + k * dcol] * peso
+                        total += peso
+            if total != 0:
+                resultado[lin, col] = soma / total
+    return resultado
+
+def test_suaviza_igual_ao_laco_por_pixel():
+    for shape in ((23, 31), (17, 12, 2), (4, 5, 3)):
+        image = rng.uniform(0, 255, shape)
+        np.testing.assert_allclose(suaviza(image), suaviza_pixel(image), rtol=1e-5)
+
+def test_pixel_sem_vizinhos_fica_como_esta():
+    image = np.array([[42.0]])
+    np.testing.assert_array_equal(suaviza(image), image)
+
+def test_imagem_constante_nao_muda():
+    image = np.full((389, 403, 2), 128.0)
+    np.testing.assert_allclose(suaviza(image), image, rtol=1e-6)
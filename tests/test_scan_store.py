@@ -0,0 +1,88 @@
+# Scans of the store against the values read from the NetCDF file (extract_native)
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+import pytest
+from netCDF4 import Dataset                           # Read / Write NetCDF4 files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from scan_store import ingest_scan, prune_scans       # Native grid store of decoded scans
+from point_extract import extract_native              # Values read straight from the GOES fixed grid
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+EXTENT = [-75.0, -34, -34, 5.5]
+SHAPE = (543, 543)   # full disk at 10 times the pixel size of band 13
+
+def write_scan(path, start='20220021000205'):
+
+    # Small full disk file of band 13: uint16 values (stored as _Unsigned int16), fill value and DQF
+    nlin, ncol = SHAPE
+    with Dataset(path, 'w') as nc:
+        nc.time_coverage_start = '2022-01-02T10:00:20.5Z'
+        nc.createDimension('y', nlin)
+        nc.createDimension('x', ncol)
+        x = nc.createVariable('x', 'i2', ('x',))
+        x.scale_factor, x.add_offset = np.float32(5.6e-04), np.float32(-0.151844)
+        y = nc.createVariable('y', 'i2', ('y',))
+        y.scale_factor, y.add_offset = np.float32(-5.6e-04), np.float32(0.151844)
+        proj = nc.createVariable('goes_imagery_projection', 'i4')
+        proj.semi_major_axis, proj.semi_minor_axis = 6378137.0, 6356752.31414
+        proj.perspective_point_height, proj.longitude_of_projection_origin = 35786023.0, -75.0
+
+        cmi = nc.createVariable('CMI', 'i2', ('y', 'x'), fill_value=np.int16(-1))
+        cmi._Unsigned = 'true'
+        cmi.scale_factor, cmi.add_offset = np.float32(0.0025), np.float32(190.0)
+        cmi.units = 'K'
+        packed = rng.integers(0, 50000, SHAPE).astype(np.uint16)
+        packed[rng.random(SHAPE) < 0.05] = 65535
+        cmi.set_auto_maskandscale(False)
+        cmi[:] = packed.view(np.int16)
+
+        dqf = nc.createVariable('DQF', 'u1', ('y', 'x'))
+        dqf[:] = rng.integers(0, 4, SHAPE).astype(np.uint8)
+
+def positions(n):
+    return rng.uniform(EXTENT[1], EXTENT[3], n), rng.uniform(EXTENT[0], EXTENT[2], n)
+
+@pytest.fixture
+def scan(tmp_path):
+    path = str(tmp_path / 'OR_ABI-L2-CMIPF-M6C13_G16_s20220021000205_e20220021009513_c20220021009592.nc')
+    write_scan(path)
+    return path
+
+def test_values_match_extract_native(scan, tmp_path):
+    lats, lons = positions(3000)
+    with Dataset(scan) as nc:
+        for dqf_max in (None, 1):
+            store = ingest_scan(scan, 'CMI', EXTENT, str(tmp_path / 'Store'), dqf_max=dqf_max)
+            for radius, stat in ((0, 'max'), (1, 'max'), (2, 'mean')):
+                expected = extract_native(nc, 'CMI', lats, lons, radius, stat, dqf_max)
+                np.testing.assert_allclose(store.values(lats, lons, radius, stat), expected, rtol=1e-6)
+
+def test_window_is_the_block_of_the_file(scan, tmp_path):
+    store = ingest_scan(scan, 'CMI', EXTENT, str(tmp_path / 'Store'), dqf_max=None)
+    lin0, lin1, col0, col1 = store.header['window']
+    with Dataset(scan) as nc:
+        expected = np.ma.filled(np.ma.asarray(nc.variables['CMI'][lin0:lin1, col0:col1], dtype=np.float64), np.nan)
+    np.testing.assert_allclose(store.read(), expected, rtol=1e-6)
+    np.testing.assert_allclose(store.read_window(10, 75, 3, 140), expected[10:75, 3:140], rtol=1e-6)
+
+    # Positions outside the stored window
+    assert np.isnan(store.values([20.0], [-10.0])).all()
+
+def test_prune_keeps_the_latest_scan_of_the_series(scan, tmp_path):
+    store_dir = tmp_path / 'Store'
+    names = ['OR_ABI-L2-CMIPF-M6C13_G16_s20220020940205_e20220020949513_c20220020949592_CMI',
+             'OR_ABI-L2-CMIPF-M6C13_G16_s20220020950205_e20220020959513_c20220020959592_CMI',
+             'OR_ABI-L2-CMIPF-M6C13_G16_s20220020940205_e20220020949513_c20220020949592_CMI_dqf1',
+             'OR_ABI-L2-CMIPF-M6C14_G16_s20220020940205_e20220020949513_c20220020949592_CMI']
+    for name in names:
+        os.makedirs(store_dir / name)
+
+    store = ingest_scan(scan, 'CMI', EXTENT, str(store_dir), dqf_max=None)
+    prune_scans(store.scan_dir)
+    assert sorted(os.listdir(store_dir)) == sorted(names[2:] + [os.path.basename(store.scan_dir)])
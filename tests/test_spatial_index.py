@@ -0,0 +1,49 @@
+# Spatial index of the fire foci / flashes against a scan of all the points
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import spatial_index                                  # Spatial index for point data
+from spatial_index import GridIndex
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+def linear_scan(lats, lons, lat, lon, radius):
+    # Positions of the points in the box around one position, as the original per-row loops
+    return [i for i in range(len(lats))
+            if abs(lats[i] - lat) <= radius and abs(lons[i] - lon) <= radius]
+
+def points(n):
+    lats = rng.uniform(-34, 5.5, n)
+    lons = rng.uniform(-75, -34, n)
+    # Points on the cell edges and duplicated points
+    lats[:100], lons[:100] = np.round(lats[:100] * 2) / 2, np.round(lons[:100] * 2) / 2
+    lats[100:150], lons[100:150] = lats[150:200], lons[150:200]
+    return lats, lons
+
+def test_queries_match_a_linear_scan(monkeypatch):
+    lats, lons = points(2000)
+    lats[200:210] = np.nan
+    q_lats, q_lons = points(500)
+    q_lats[:100], q_lons[:100] = lats[:100] + 0.5, lons[:100] - 0.5   # exactly at the radius
+
+    monkeypatch.setattr(spatial_index, 'BATCH_SIZE', 64)
+    for radius, cell_size in ((0.5, 0.5), (0.3, 0.5), (1.2, 0.5), (0.5, 2.0)):
+        index = GridIndex(lats, lons, cell_size)
+        counts = index.count_many(q_lats, q_lons, radius)
+        for k, (lat, lon) in enumerate(zip(q_lats, q_lons)):
+            expected = linear_scan(lats, lons, lat, lon, radius)
+            assert counts[k] == len(expected)
+            assert list(index.within(lat, lon, radius)) == expected
+            assert index.any_within(lat, lon, radius) == bool(expected)
+        np.testing.assert_array_equal(index.query_many(q_lats, q_lons, radius), counts > 0)
+
+def test_empty_index():
+    index = GridIndex([], [])
+    assert len(index) == 0
+    assert not index.any_within(-10, -50)
+    assert index.count_many([-10, -20], [-50, -60]).tolist() == [0, 0]
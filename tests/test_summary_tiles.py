@@ -0,0 +1,102 @@
+# Summary tile table and the choice of the composition answered from it
+
+# Required modules
+import os                                             # Miscellaneous operating system interfaces
+import sys                                            # System-specific parameters
+import numpy as np                                    # Scientific computing with Python
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from summary_tiles import SummaryTiles, EXTENT        # Summary tile grid
+from spatial_index import GridIndex                   # Fire foci of the per-pixel path
+from goes_projection import GoesProjection, ndvi_projection, goes16_projection # GOES fixed grid geometry
+from composition import (choose_composition, is_storm, is_low_ndvi, summary_fire, summary_test, summary_or_pixel,
+                         FIRE_RADIUS)                          # Choice of the composition
+
+#-----------------------------------------------------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+
+def positions(n):
+    return rng.uniform(EXTENT[1] + 1, EXTENT[3] - 1, n), rng.uniform(EXTENT[0] + 1, EXTENT[2] - 1, n)
+
+def ndvi_scene():
+    # Smooth NDVI field on the CEPAGRI grid (low in the south, high in the north)
+    grid = GoesProjection(ndvi_projection.xscale, ndvi_projection.xoffset,
+                          ndvi_projection.yscale, ndvi_projection.yoffset, shape=(217, 217))
+    lats, lons = grid.grid2latlon()
+    return np.clip(0.5 + lats / 40, 0, 1).astype(np.float32), grid
+
+def cmi_scene():
+    # Band 13 (°C) of the Brazil window, cold west of -60 with a few missing pixels
+    grid = goes16_projection.subset(*goes16_projection.window(EXTENT))
+    lats, lons = grid.grid2latlon()
+    celsius = np.where(lons < -60, -70, 10).astype(np.float32)
+    celsius[rng.random(celsius.shape) < 0.001] = np.nan
+    return celsius, grid
+
+def test_count_within_brackets_the_foci_in_the_box():
+    lats, lons = positions(3000)
+    lats[:500], lons[:500] = np.round(lats[:500], 1), np.round(lons[:500], 1) # foci on the tile edges
+    tiles = SummaryTiles()
+    tiles.add_points('fire', lats, lons)
+    index = GridIndex(lats, lons)
+
+    q_lats, q_lons = positions(2000)
+    for lat, lon, count in zip(q_lats, q_lons, index.count_many(q_lats, q_lons, FIRE_RADIUS)):
+        surely, maybe = tiles.count_within('fire', lat, lon, FIRE_RADIUS)
+        assert surely <= count <= maybe
+
+def test_pixel_range_has_the_pixel_of_the_position():
+    for values, grid in (ndvi_scene(), cmi_scene()):
+        tiles = SummaryTiles()
+        tiles.add_pixels('p', values, grid)
+        lats, lons = positions(5000)
+        lins, cols = grid.geo2grid(lats, lons)
+        for lat, lon, value in zip(lats, lons, values[lins, cols]):
+            minimum, maximum, missing = tiles.pixel_range('p', lat, lon)
+            if np.isnan(value):
+                assert missing
+            else:
+                assert minimum <= value <= maximum
+
+def test_composition_without_fire_or_storm_is_answered_by_the_table():
+    ndvi, ndvi_grid = ndvi_scene()
+    celsius, cmi_grid = cmi_scene()
+    tiles = SummaryTiles()
+    tiles.add_points('fire', [-30.0], [-70.0])
+    tiles.add_pixels('CMI13', celsius, cmi_grid)
+    tiles.add_pixels('NDVI', ndvi, ndvi_grid)
+
+    def pixel():
+        raise AssertionError('the table should have answered')
+
+    lats, lons = positions(2000)
+    lons = np.maximum(lons, -55)   # away from the fire and the storm
+    answered = 0
+    for lat, lon in zip(lats, lons):
+        fire = summary_fire(tiles, lat, lon)
+        storm = summary_test(tiles, 'CMI13', lat, lon, is_storm)
+        low_ndvi = summary_test(tiles, 'NDVI', lat, lon, is_low_ndvi)
+        assert fire is False
+        assert storm is not True
+        if storm is None or low_ndvi is None:
+            continue
+        answered += 1
+
+        # Same answer as reading the pixel of the position
+        lin, col = ndvi_projection.geo2grid(lat, lon)
+        assert low_ndvi == is_low_ndvi(ndvi[lin, col])
+        expected = "composição ndvi" if low_ndvi else "agradavel"
+        assert expected in choose_composition(lambda: fire, lambda: storm, lambda: low_ndvi)
+    assert answered > 0.9 * len(lats)
+
+    # One position, through the shared criterion, without reading any pixel
+    lat, lon = -20.0, -45.0
+    composition = choose_composition(lambda: summary_or_pixel(summary_fire(tiles, lat, lon), pixel),
+                                     lambda: summary_or_pixel(summary_test(tiles, 'CMI13', lat, lon, is_storm), pixel),
+                                     lambda: summary_or_pixel(summary_test(tiles, 'NDVI', lat, lon, is_low_ndvi), pixel))
+    assert composition == "composição ndvi"
+
+def test_missing_product_falls_back_to_the_pixel():
+    tiles = SummaryTiles()
+    assert summary_fire(tiles, -10, -50) is None
+    assert summary_test(tiles, 'NDVI', -10, -50, is_low_ndvi) is None